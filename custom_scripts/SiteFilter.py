@@ -1,25 +1,132 @@
 """
 Site Filter Report Script for NetBox UI
 
-This custom script allows users to filter NetBox sites based on their status (active or planned)
-and generates a standardized report in YAML format.
+This custom script allows users to filter NetBox sites by one or more statuses and generates a
+standardized report in YAML (or JSON/CSV) format, or a summary of the counts per status, region
+and tenant.
 """
 
-from extras.scripts import Script, ChoiceVar
-from dcim.models import Site
+from extras.scripts import Script, BooleanVar, ChoiceVar, IntegerVar, MultiChoiceVar
+from dcim.choices import SiteStatusChoices
+from dcim.models import Region, Site
+from tenancy.models import Tenant
+from django.db.models import Count, Max
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
 from django.utils.text import slugify
+from collections import Counter
+import csv
+import hashlib
+import io
+import json
+import tempfile
 import yaml
 
 
+# Rows fetched per round trip by the server-side cursor
+CHUNK_SIZE = 2000
+
+# Sites logged one by one by default; the rest are only in the report
+DEFAULT_LOG_LIMIT = 100
+
+# Reports with more sites are saved as a file instead of returned inline
+INLINE_LIMIT = 1000
+
+# Report bytes kept in memory before spilling to a temporary file
+SPOOL_SIZE = 4 * 1024 * 1024
+
+# Directory of the report files in the media storage
+REPORTS_DIR = "reports"
+
+# Seconds a rendered report is kept in the cache (Redis "caching" database).
+# Entries are also keyed by a fingerprint of the site table, so changes to
+# sites make them unreachable before that
+CACHE_TIMEOUT = 60 * 60
+
+CACHE_PREFIX = "netbox-test:sitefilter"
+
+# libyaml emitter when PyYAML was built with it, pure Python otherwise
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+FIELDS = ("id", "name", "status")
+
+# Columns the summary mode groups by, with the value reported for each group
+SUMMARY_GROUPS = {
+    "status": "status",
+    "region": "region__name",
+    "tenant": "tenant__name",
+}
+
+
+def write_yaml(stream, rows):
+    """Write rows as a YAML sequence, one item emitted per row"""
+    for row in rows:
+        stream.write(yaml.dump([row], Dumper=YAML_DUMPER))
+
+
+def write_json(stream, rows):
+    """Write rows as a JSON array, one element per line"""
+    stream.write("[")
+    for index, row in enumerate(rows):
+        if index:
+            stream.write(",")
+        stream.write("\n" + json.dumps(row))
+    stream.write("\n]\n")
+
+
+def write_csv(stream, rows):
+    """Write rows as CSV with a header row"""
+    writer = csv.DictWriter(stream, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_summary(stream, summary, report_format):
+    """
+    Write the counts of the summary mode
+
+    Args:
+        stream (TextIO): Stream to write to
+        summary (dict): Counts by value, for each group
+        report_format (str): yaml, json or csv (one row per group and value)
+    """
+    if report_format == "yaml":
+        yaml.dump(summary, stream, Dumper=YAML_DUMPER, sort_keys=False)
+    elif report_format == "json":
+        json.dump(summary, stream, indent=2)
+        stream.write("\n")
+    else:
+        writer = csv.writer(stream)
+        writer.writerow(["group", "value", "count"])
+        for group, counts in summary.items():
+            writer.writerows([group, value, count] for value, count in counts.items())
+
+
+# Writer and file extension of each report format
+REPORT_FORMATS = {
+    "yaml": (write_yaml, "yaml"),
+    "json": (write_json, "json"),
+    "csv": (write_csv, "csv"),
+}
+
+
 class SiteFilter(Script):
     """
-    A NetBox custom script that filters sites based on their status (active or planned).
-    
+    A NetBox custom script that filters sites based on their status.
+
     This script:
-    1. Create a required status filter
-    2. Query the NetBox database for matching sites
-    3. Generate standardized log entries for each site
-    4. Output results in YAML format
+    1. Create a required filter with one or more statuses
+    2. Query the NetBox database for matching sites in a single query (only id,
+       name and status, streamed in chunks in a single pass), or count them per
+       status, region and tenant in the database for a summary
+    3. Generate standardized log entries for the first sites (up to a limit)
+       and a count per status
+    4. Stream the results in YAML, JSON or CSV format; large reports are saved
+       as a file in the media storage instead of returned inline
+    5. Cache the rendered report (and its log entries) in the NetBox cache, so
+       repeated runs with the same filters return at once until sites change
     """
 
     class Meta:
@@ -28,46 +135,230 @@ class SiteFilter(Script):
         """
         name = "Site Status Filter Report"
         description = (
-            "Filter sites by status (active or planned) and generate YAML output."
+            "Filter sites by status and generate YAML, JSON or CSV output, or a summary of counts."
         )
 
-    # Field to select the site status
-    status = ChoiceVar(
-        description="Select the site status to filter",
+    # Field to select the site statuses (every status choice, including custom ones)
+    status = MultiChoiceVar(
+        description="Select the site statuses to filter",
         required=True,
-        choices=[("active", "Active"), ("planned", "Planned")],
+        choices=SiteStatusChoices,
+    )
+
+    # Field to only count the sites instead of listing them
+    summary = BooleanVar(
+        description="Only report the number of sites per status, region and tenant",
+        required=False,
+        default=False,
+    )
+
+    # Field to select the report format
+    report_format = ChoiceVar(
+        description="Format of the report",
+        required=False,
+        default="yaml",
+        choices=[("yaml", "YAML"), ("json", "JSON"), ("csv", "CSV")],
+    )
+
+    # Field to cap the log entries per site
+    log_limit = IntegerVar(
+        description="Sites logged one by one (the full list is always in the report)",
+        required=False,
+        default=DEFAULT_LOG_LIMIT,
+        min_value=0,
+    )
+
+    # Field to skip the cached report
+    use_cache = BooleanVar(
+        description="Reuse the report of a previous run if no site changed since",
+        required=False,
+        default=True,
     )
 
     def run(self, data, commit):
         """
-        Execute the script to filter sites by status and generate YAML output.
-        
+        Execute the script to filter sites by status and generate the report.
+
         Args:
-            data (dict): Contains form data submitted by the user, including the selected status
+            data (dict): Contains form data submitted by the user, including the selected
+                         statuses and report format
             commit (bool): Indicates whether database changes should be committed
                           (not used in this read-only script)
-        
+
         Returns:
-            str: YAML-formatted string containing the filtered site information
+            str: The report, or a link to the report file if it has more than
+                 INLINE_LIMIT sites
         """
         selected_statuses = data["status"]
+        if isinstance(selected_statuses, str):
+            selected_statuses = [selected_statuses]
+        statuses = sorted(slugify(status) for status in selected_statuses)
+        report_format = data.get("report_format") or "yaml"
+        summary = bool(data.get("summary"))
+        log_limit = data.get("log_limit")
+        if log_limit is None:
+            log_limit = DEFAULT_LOG_LIMIT
 
-        # Filter sites based on the selected status
-        sites = Site.objects.filter(status=slugify(selected_statuses))
+        # Filter sites based on the selected statuses, all in one query
+        queryset = Site.objects.filter(status__in=statuses)
 
-        # iterate through all sites that match the selected filter criteria
-        for site in sites:
-            # Log in required format
-            # If we don't scape hashtag, it will be interpreted as a header mark
-            self.log_info(f"\#{site.id}: {site.name} - {site.status}")
+        # Log entries of this run, replayed when the report comes from the cache
+        self._log_entries = []
+        cache_key = self.cache_key(statuses, report_format, summary, log_limit)
+        if data.get("use_cache", True):
+            cached = cache.get(cache_key)
+            if cached is not None and (
+                cached["artifact"] is None or default_storage.exists(cached["artifact"])
+            ):
+                for level, message in cached["logs"]:
+                    getattr(self, f"log_{level}")(message)
+                self.log_info("Report served from the cache: no site changed since it was generated.")
+                return cached["output"]
 
-        # Output in YAML format
-        output_data = [
-            {"id": site.id, "name": site.name, "status": site.status} for site in sites
-        ]
+        self._artifact = None
+        if summary:
+            output = self.summarize(queryset, report_format)
+        else:
+            output = self.list_sites(queryset, statuses, report_format, log_limit)
 
-        # If no sites found, return a message
-        if not output_data:
-            self.log_warning("No sites found with the selected status.")
+        cache.set(
+            cache_key,
+            {"output": output, "logs": self._log_entries, "artifact": self._artifact},
+            CACHE_TIMEOUT,
+        )
+        return output
+
+    def record_log(self, level, message):
+        """Log a message and keep it for the cached report"""
+        getattr(self, f"log_{level}")(message)
+        self._log_entries.append((level, message))
+
+    def cache_key(self, statuses, report_format, summary, log_limit):
+        """
+        Build the cache key of a report
+
+        The key holds the filters and a fingerprint of the data: the latest
+        last_updated and the number of sites (deletions don't touch
+        last_updated), plus the latest region and tenant change for the
+        summary, which reports their names. Any change gives a new key, so a
+        stale report is never returned.
+
+        Returns:
+            str: Cache key
+        """
+        fingerprint = Site.objects.aggregate(updated=Max("last_updated"), count=Count("pk"))
+        if summary:
+            fingerprint["region"] = Region.objects.aggregate(updated=Max("last_updated"))["updated"]
+            fingerprint["tenant"] = Tenant.objects.aggregate(updated=Max("last_updated"))["updated"]
+        parts = json.dumps(
+            [statuses, report_format, summary, log_limit, fingerprint], default=str
+        )
+        return f"{CACHE_PREFIX}:{hashlib.sha256(parts.encode('utf-8')).hexdigest()}"
+
+    def list_sites(self, queryset, statuses, report_format, log_limit):
+        """
+        List the matching sites in the report format.
+
+        Args:
+            queryset (QuerySet): Sites matching the selected statuses
+            statuses (list): Selected statuses (for the file name)
+            report_format (str): yaml, json or csv
+            log_limit (int): Sites logged one by one
+
+        Returns:
+            str: The report, or a link to the report file
+        """
+        write_rows, extension = REPORT_FORMATS[report_format]
+
+        # Only the three columns used are selected, as tuples instead of model
+        # instances, and rows are streamed from a server-side cursor in chunks
+        sites = (
+            queryset
+            .values_list("id", "name", "status")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+
+        # Every log entry is stored with the job and rendered in the UI, so
+        # only the first log_limit sites are logged and the rest are counted
+        status_counts = Counter()
+        logged = 0
+
+        def rows():
+            # A single pass feeds both the log entries and the report
+            nonlocal logged
+            for site_id, name, status in sites:
+                if logged < log_limit:
+                    # Log in required format
+                    # If we don't scape hashtag, it will be interpreted as a header mark
+                    self.record_log("info", f"\\#{site_id}: {name} - {status}")
+                    logged += 1
+                status_counts[status] += 1
+                yield {"id": site_id, "name": name, "status": status}
+
+        # The report is written as the rows arrive, in memory while it is
+        # small and in a temporary file beyond SPOOL_SIZE
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as report:
+            text = io.TextIOWrapper(report, encoding="utf-8", newline="")
+            write_rows(text, rows())
+            text.flush()
+            text.detach()
+
+            # If no sites found, return a message
+            count = sum(status_counts.values())
+            if not count:
+                self.record_log("warning", "No sites found with the selected statuses.")
+                return "No sites found."
+
+            if count > logged:
+                self.record_log("info", f"Logged {logged} of {count} sites; the full list is in the report.")
+            for status, status_count in sorted(status_counts.items()):
+                self.record_log("info", f"{status}: {status_count} sites")
+
+            report.seek(0)
+            if count <= INLINE_LIMIT:
+                return report.read().decode("utf-8")
+
+            # Too large to show inline: save it as a file artifact
+            timestamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+            name = default_storage.save(
+                f"{REPORTS_DIR}/sites-{'-'.join(statuses)}-{timestamp}.{extension}",
+                File(report),
+            )
+
+        self._artifact = name
+        url = default_storage.url(name)
+        self.record_log("success", f"Report with {count} sites saved as [{name}]({url})")
+        return f"{count} sites found. The report was saved as {name}: {url}"
+
+    def summarize(self, queryset, report_format):
+        """
+        Count the matching sites per status, region and tenant.
+
+        Each count is a GROUP BY query, so no site rows are read in Python.
+
+        Args:
+            queryset (QuerySet): Sites matching the selected statuses
+            report_format (str): yaml, json or csv
+
+        Returns:
+            str: The counts in the report format
+        """
+        summary = {}
+        for group, column in SUMMARY_GROUPS.items():
+            rows = (
+                queryset.order_by()
+                .values_list(column)
+                .annotate(count=Count("pk"))
+                .order_by(column)
+            )
+            summary[group] = {value: count for value, count in rows}
+
+        if not summary["status"]:
+            self.record_log("warning", "No sites found with the selected statuses.")
             return "No sites found."
-        return yaml.dump(output_data)
+        for status, count in summary["status"].items():
+            self.record_log("info", f"{status}: {count} sites")
+
+        report = io.StringIO()
+        write_summary(report, summary, report_format)
+        return report.getvalue()
@@ -5,10 +5,13 @@
 ####
 
 import re
+from copy import deepcopy
 from os import environ
 from os.path import abspath, dirname, join
 from typing import Any, Callable, Tuple
 
+from django.core.exceptions import ImproperlyConfigured
+
 # For reference see https://docs.netbox.dev/en/stable/configuration/
 # Based on https://github.com/netbox-community/netbox/blob/develop/netbox/netbox/configuration_example.py
 
@@ -79,6 +82,59 @@ DATABASE = {
                                                     # Disable the use of server-side cursors transaction pooling
 }
 
+# Driver-level connection pool (psycopg_pool), shared by the threads of each NetBox process. Every Unit process and
+# RQ worker has its own pool, so Postgres sees up to processes * DB_POOL_MAX_SIZE connections. See
+#   https://docs.djangoproject.com/en/stable/ref/databases/#connection-pool
+if _environ_get_and_map('DB_POOL_ENABLED', 'False', _AS_BOOL):
+    _DB_POOL = {
+        'min_size': _environ_get_and_map('DB_POOL_MIN_SIZE', '2', _AS_INT),
+        'max_size': _environ_get_and_map('DB_POOL_MAX_SIZE', '4', _AS_INT),
+        'timeout': _environ_get_and_map('DB_POOL_TIMEOUT', '10', float),          # Seconds to wait for a connection
+        'max_lifetime': _environ_get_and_map('DB_POOL_MAX_LIFETIME', '3600', float),
+                                                                                    # Seconds before a connection is replaced
+    }
+    if not 0 <= _DB_POOL['min_size'] <= _DB_POOL['max_size'] or _DB_POOL['max_size'] < 1:
+        raise ImproperlyConfigured('DB_POOL_MIN_SIZE and DB_POOL_MAX_SIZE must satisfy 0 <= min <= max and max >= 1.')
+    if _DB_POOL['timeout'] <= 0 or _DB_POOL['max_lifetime'] <= 0:
+        raise ImproperlyConfigured('DB_POOL_TIMEOUT and DB_POOL_MAX_LIFETIME must be positive.')
+    # Pooled connections are returned to the pool after each request, Django refuses persistent ones on top
+    if _environ_get_and_map('DB_CONN_MAX_AGE', '0', _AS_INT) != 0:
+        raise ImproperlyConfigured('DB_CONN_MAX_AGE must be 0 (or unset) when DB_POOL_ENABLED is true.')
+    DATABASE['CONN_MAX_AGE'] = 0
+    DATABASE['OPTIONS']['pool'] = _DB_POOL
+
+# Transaction-mode pooler (e.g. PgBouncer with pool_mode = transaction) between NetBox and Postgres. Consecutive
+# transactions may run on different server connections, so cursors can't outlive a transaction and statements can't
+# stay prepared on the server.
+if _environ_get_and_map('DB_TRANSACTION_POOLER', 'False', _AS_BOOL):
+    DATABASE['DISABLE_SERVER_SIDE_CURSORS'] = True
+    DATABASE['OPTIONS']['prepare_threshold'] = None
+
+# Read replicas of the primary database, as space separated `host` or `host:port` entries. Reads are sent to a replica
+# and writes to the primary by `netbox.database_router.ReplicaRouter`; the replicas use the database name, options and
+# pool settings of the primary.
+_DB_REPLICAS = _environ_get_and_map('DB_REPLICAS', '', _AS_LIST)
+if _DB_REPLICAS:
+    DATABASES = {'default': DATABASE}
+    for _index, _replica in enumerate(_DB_REPLICAS, start=1):
+        _host, _, _port = _replica.partition(':')
+        DATABASES[f'replica{_index}'] = {
+            **DATABASE,
+            'HOST': _host,
+            'PORT': _port or DATABASE['PORT'],
+            'USER': environ.get('DB_REPLICA_USER', DATABASE['USER']),
+            'PASSWORD': _read_secret('db_replica_password', environ.get('DB_REPLICA_PASSWORD', DATABASE['PASSWORD'])),
+            'OPTIONS': deepcopy(DATABASE['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+    DATABASE_ROUTERS = ['netbox.database_router.ReplicaRouter']
+    # NetBox refuses to start when both DATABASE and DATABASES are set
+    del DATABASE
+
+# Seconds a replica may lag behind the primary before reads skip it, and seconds between two lag checks of a replica
+DATABASE_REPLICA_MAX_LAG = _environ_get_and_map('DB_REPLICA_MAX_LAG', '10', float)
+DATABASE_REPLICA_CHECK_INTERVAL = _environ_get_and_map('DB_REPLICA_CHECK_INTERVAL', '5', float)
+
 # Redis database settings. Redis is used for caching and for queuing background tasks such as webhook events. A separate
 # configuration exists for each. Full connection details are required in both sections, and it is strongly recommended
 # to use two separate database IDs.
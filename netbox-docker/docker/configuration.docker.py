@@ -4,10 +4,15 @@
 #
 # They can be imported by other code (see `ldap_config.py` for an example).
 
+import hashlib
 import importlib.util
+import os
+import pickle
 import sys
-from os import scandir
-from os.path import abspath, isfile
+from collections.abc import MutableMapping
+from os import environ, scandir
+from os.path import abspath, isdir, isfile
+from types import ModuleType
 
 
 def _filename(f):
@@ -61,31 +66,263 @@ def read_configurations(config_module, config_dir, main_config):
     return loaded_configurations
 
 
+_MISSING = object()
+
+
+class ConfigurationResolver:
+    """
+    Resolves configuration options across the loaded configuration modules.
+
+    The options of all modules are merged once into a lookup table, in the
+    same precedence order as `_loaded_configurations` (the first module that
+    defines an option wins), so resolving an option is a single dict lookup.
+    Names that no module defines are remembered too, so repeated misses
+    (e.g. `getattr(settings, "X", default)`) don't walk the modules again.
+
+    Call `rebuild()` whenever the list of loaded configurations changes.
+    """
+
+    def __init__(self, loaded_configurations, snapshot=None):
+        self.loaded_configurations = loaded_configurations
+        self.snapshot = snapshot
+        self.rebuild()
+
+    def rebuild(self):
+        table = dict(self.snapshot or {})
+        for config in reversed(self.loaded_configurations):
+            table.update(vars(config))
+        self._table = table
+        self._missing = set()
+
+    def resolve(self, name):
+        try:
+            return self._table[name]
+        except KeyError:
+            pass
+        if name in self._missing:
+            raise AttributeError(name)
+
+        # Not a plain module attribute: a configuration module may still
+        # provide it dynamically (e.g. with its own `__getattr__`)
+        for config in self.loaded_configurations:
+            value = getattr(config, name, _MISSING)
+            if value is not _MISSING:
+                self._table[name] = value
+                return value
+        self._missing.add(name)
+        raise AttributeError(name)
+
+    def names(self):
+        return list(self._table)
+
+
+## Configuration Snapshot
+# Evaluating the configuration files (environment parsing, secret files, regex
+# compilation, ...) is repeated by every process that imports the
+# configuration: each Unit worker, RQ worker and `manage.py` call. The
+# entrypoint evaluates them once and stores the resulting settings in a
+# snapshot, which the processes load instead while it is fresh, i.e. while
+# the configuration files, secrets, Python version and the environment
+# variables read by the configuration are the same as when it was written.
+# Otherwise the files are read as usual.
+
+SECRETS_DIR = "/run/secrets/"
+
+# Settings that must be present for a snapshot to be written
+_REQUIRED_SETTINGS = ("ALLOWED_HOSTS", "REDIS", "SECRET_KEY")
+
+
+class _EnvironRecorder(MutableMapping):
+    """Stand-in for `os.environ` that records the variables that are read"""
+
+    def __init__(self, environ):
+        self._environ = environ
+        self.names = set()
+
+    def __getitem__(self, name):
+        self.names.add(name)
+        return self._environ[name]
+
+    def __setitem__(self, name, value):
+        self.names.add(name)
+        self._environ[name] = value
+
+    def __delitem__(self, name):
+        self.names.add(name)
+        del self._environ[name]
+
+    def __iter__(self):
+        # Listing the variables makes the settings depend on all of them
+        self.names.update(self._environ)
+        return iter(self._environ)
+
+    def __len__(self):
+        return len(self._environ)
+
+    def copy(self):
+        return dict(self)
+
+
+def _read_recording_environ(read):
+    """Call `read()` and return its result with the environment variables it read"""
+    recorder = _EnvironRecorder(os.environ)
+    # Configuration files bind `os.environ` (`from os import environ`) when
+    # they are executed, and `os.getenv()` looks it up on every call
+    os.environ = recorder
+    try:
+        return read(), recorder.names
+    finally:
+        os.environ = recorder._environ
+
+
+def _snapshot_fingerprint(config_dir, environ_names):
+    digest = hashlib.sha256(sys.version.encode())
+    for directory in (config_dir, SECRETS_DIR):
+        if not isdir(directory):
+            continue
+        with scandir(directory) as it:
+            for f in sorted(it, key=_filename):
+                if f.is_file():
+                    stat = f.stat()
+                    digest.update(f"{f.path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    for name in sorted(environ_names):
+        value = environ.get(name)
+        digest.update((f"{name}\n" if value is None else f"{name}={value}\n").encode())
+    return digest.hexdigest()
+
+
+def _is_setting(name, value):
+    return (
+        name.isupper()
+        and not name.startswith("_")
+        and not callable(value)
+        and not isinstance(value, ModuleType)
+    )
+
+
+def write_snapshot(path, config_dir, loaded_configurations, environ_names):
+    """
+    Store the settings of the loaded configuration modules in a snapshot.
+
+    Only settings are stored: upper case names, without the private helpers
+    (`_AS_BOOL`, ...), functions and modules the configuration files define
+    for themselves. Nothing is written if a setting can't be pickled or a
+    required setting is missing, so the
+    processes keep reading the configuration files. `environ_names` are the
+    environment variables the configuration read: the snapshot is stale
+    once one of them changes.
+
+    Returns whether the snapshot was written.
+    """
+    settings = {}
+    for config in reversed(loaded_configurations):
+        settings.update(
+            (name, value) for name, value in vars(config).items() if _is_setting(name, value)
+        )
+
+    missing = [name for name in _REQUIRED_SETTINGS if name not in settings]
+    if missing:
+        print(f"⚠️ Configuration snapshot not written, missing settings: {', '.join(missing)}")
+        return False
+    try:
+        data = pickle.dumps(
+            {
+                "fingerprint": _snapshot_fingerprint(config_dir, environ_names),
+                "environ": sorted(environ_names),
+                "settings": settings,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    except Exception as e:
+        print(f"⚠️ Configuration snapshot not written, settings can't be stored: {e}")
+        return False
+
+    # Readable by the current user only: it holds secrets
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    print(f"🧊 wrote config snapshot '{path}' ({len(settings)} settings)")
+    return True
+
+
+def read_snapshot(path, config_dir):
+    """Return the settings of a fresh snapshot, or None."""
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"⚠️ Ignoring unreadable config snapshot '{path}': {e}")
+        return None
+
+    with os.fdopen(fd, "rb") as f:
+        # Unpickling runs code: only trust a file nobody else can have written
+        stat = os.fstat(f.fileno())
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+            print(
+                f"⚠️ Ignoring config snapshot '{path}': "
+                "not owned by this user or writable by others"
+            )
+            return None
+        try:
+            snapshot = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable config snapshot '{path}': {e}")
+            return None
+
+    fingerprint = _snapshot_fingerprint(config_dir, snapshot.get("environ", ()))
+    if snapshot.get("fingerprint") != fingerprint:
+        return None
+    print(f"🧬 loaded config snapshot '{path}'")
+    return snapshot["settings"]
+
+
 ## Specific Parts
 # This section's code actually loads the various configuration files
 # into the module with the given name.
 # It contains the logic to resolve arbitrary configuration options by
-# levaraging dynamic programming using `__getattr__`.
+# levaraging dynamic programming using `__getattr__`, backed by the
+# precomputed lookup table of a `ConfigurationResolver`.
+
+_CONFIG_DIR = environ.get("CONFIG_DIR", "/etc/netbox/config/")
+# In the temporary directory of Unit, owned by the user running NetBox
+_SNAPSHOT_PATH = environ.get("CONFIG_SNAPSHOT", "/opt/unit/tmp/netbox-configuration.pickle")
+
+
+def _read_configurations():
+    return read_configurations(
+        config_dir=_CONFIG_DIR,
+        config_module="netbox.configuration",
+        main_config="configuration",
+    )
+
 
+_snapshot = None
+if environ.get("CONFIG_SNAPSHOT_ENABLED", "true").lower() == "true":
+    _snapshot = read_snapshot(_SNAPSHOT_PATH, _CONFIG_DIR)
 
-_loaded_configurations = read_configurations(
-    config_dir="/etc/netbox/config/",
-    config_module="netbox.configuration",
-    main_config="configuration",
-)
+_loaded_configurations = [] if _snapshot is not None else _read_configurations()
+_resolver = ConfigurationResolver(_loaded_configurations, _snapshot)
+
+
+def reload_configurations():
+    """Read the configuration files again and rebuild the lookup table."""
+    _loaded_configurations[:] = _read_configurations()
+    _resolver.snapshot = None
+    _resolver.rebuild()
+
+
+def compile_snapshot():
+    """Evaluate the configuration files and write a fresh snapshot."""
+    loaded_configurations, environ_names = _read_recording_environ(_read_configurations)
+    return write_snapshot(_SNAPSHOT_PATH, _CONFIG_DIR, loaded_configurations, environ_names)
 
 
 def __getattr__(name):
-    for config in _loaded_configurations:
-        try:
-            return getattr(config, name)
-        except:
-            pass
-    raise AttributeError
+    return _resolver.resolve(name)
 
 
 def __dir__():
-    names = []
-    for config in _loaded_configurations:
-        names.extend(config.__dir__())
-    return names
+    return _resolver.names()
@@ -0,0 +1,106 @@
+## Read Replica Router
+# Sends reads to the read replicas declared with `DB_REPLICAS` (see
+# `configuration.py`) and everything else to the primary (`default`):
+#
+# - writes, and reads inside a transaction, go to the primary
+# - once a request (or job) has written, its later reads stay on the primary,
+#   so it reads its own writes
+# - a replica lagging more than `DATABASE_REPLICA_MAX_LAG` seconds behind the
+#   primary, or failing the lag check, is skipped until the next check; reads
+#   fall back to the primary when no replica is usable
+
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from netbox import configuration
+
+# Seconds a replica may lag behind the primary before it is skipped
+DEFAULT_MAX_LAG = 10
+
+# Seconds a lag measurement is reused
+DEFAULT_CHECK_INTERVAL = 5
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received
+# and for a server that isn't in recovery
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# Whether the current request or job has written to the primary
+_pinned = ContextVar("netbox_database_pinned", default=False)
+
+
+def _unpin(**kwargs):
+    _pinned.set(False)
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = [alias for alias in connections if alias != DEFAULT_DB_ALIAS]
+        self.max_lag = getattr(configuration, "DATABASE_REPLICA_MAX_LAG", DEFAULT_MAX_LAG)
+        self.check_interval = getattr(
+            configuration, "DATABASE_REPLICA_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL
+        )
+        # Replica alias -> (time of the check, usable)
+        self._health = {}
+        self._lock = threading.Lock()
+        request_started.connect(_unpin, dispatch_uid="netbox_replica_router_started")
+        request_finished.connect(_unpin, dispatch_uid="netbox_replica_router_finished")
+
+    def _lag(self, alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            return float(cursor.fetchone()[0])
+
+    def _usable(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            checked = self._health.get(alias)
+            if checked is not None and now - checked[0] < self.check_interval:
+                return checked[1]
+
+        try:
+            usable = self._lag(alias) <= self.max_lag
+        except Exception:
+            usable = False
+            # Don't keep a broken connection for the next check
+            connections[alias].close()
+
+        with self._lock:
+            self._health[alias] = (now, usable)
+        return usable
+
+    def db_for_read(self, model, **hints):
+        if (
+            not self.replicas
+            or _pinned.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+
+        replicas = random.sample(self.replicas, len(self.replicas))
+        for alias in replicas:
+            if self._usable(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db == DEFAULT_DB_ALIAS
@@ -11,6 +11,13 @@ umask 002
 # shellcheck disable=SC1091
 source /opt/netbox/venv/bin/activate
 
+# Evaluate the configuration once for all NetBox processes
+if [ "${CONFIG_SNAPSHOT_ENABLED-true}" == "true" ]; then
+  echo "⚙️ Compiling the configuration snapshot"
+  python -c "from netbox import configuration; configuration.compile_snapshot()" ||
+    echo "⚠️ Configuration snapshot not written, the configuration files are read instead"
+fi
+
 # Try to connect to the DB
 DB_WAIT_TIMEOUT=${DB_WAIT_TIMEOUT-3}
 MAX_DB_WAIT_TIME=${MAX_DB_WAIT_TIME-30}
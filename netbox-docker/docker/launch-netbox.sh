@@ -4,6 +4,118 @@ UNIT_CONFIG="${UNIT_CONFIG-/etc/unit/nginx-unit.json}"
 # Also used in "nginx-unit.json"
 UNIT_SOCKET="/opt/unit/unit.sock"
 
+# CPUs available to the container: the cgroup CPU quota, rounded up, or all CPUs without a quota
+cpu_limit() {
+  local cpus quota period
+  cpus=$(nproc)
+  if [ -r /sys/fs/cgroup/cpu.max ]; then
+    read -r quota period </sys/fs/cgroup/cpu.max
+  elif [ -r /sys/fs/cgroup/cpu/cpu.cfs_quota_us ]; then
+    quota=$(cat /sys/fs/cgroup/cpu/cpu.cfs_quota_us)
+    period=$(cat /sys/fs/cgroup/cpu/cpu.cfs_period_us)
+  fi
+  if [[ "$quota" =~ ^[0-9]+$ ]] && [ "$period" -gt 0 ]; then
+    quota=$(((quota + period - 1) / period))
+    if [ "$quota" -lt "$cpus" ]; then
+      cpus=$quota
+    fi
+  fi
+  echo $((cpus > 0 ? cpus : 1))
+}
+
+# Memory available to the container in MiB: the cgroup memory limit, or the memory of the host without a limit
+memory_limit() {
+  local host limit
+  host=$(($(awk '/^MemTotal:/ { print $2 }' /proc/meminfo) / 1024))
+  if [ -r /sys/fs/cgroup/memory.max ]; then
+    limit=$(cat /sys/fs/cgroup/memory.max)
+  elif [ -r /sys/fs/cgroup/memory/memory.limit_in_bytes ]; then
+    limit=$(cat /sys/fs/cgroup/memory/memory.limit_in_bytes)
+  fi
+  # cgroup v1 reports "no limit" as a huge number
+  if [[ "$limit" =~ ^[0-9]+$ ]] && [ $((limit / 1048576)) -lt "$host" ]; then
+    echo $((limit / 1048576))
+  else
+    echo "$host"
+  fi
+}
+
+# Succeeds when the variable named $1 is unset, empty, or a decimal integer of at least $2
+check_integer() {
+  local value=${!1}
+  if [ -n "$value" ] && ! { [[ "$value" =~ ^(0|[1-9][0-9]*)$ ]] && [ "$value" -ge "$2" ]; }; then
+    echo "⚠️ $1 must be an integer of at least $2, not '$value'"
+    return 1
+  fi
+}
+
+# Sizes the "netbox" application of $UNIT_CONFIG from the CPUs and memory of the container
+# and writes the result to /opt/unit/tmp/, which becomes the new $UNIT_CONFIG.
+# Every value can be set with an environment variable instead:
+#   UNIT_PROCESSES        application processes (default: one per CPU, as many as fit in memory)
+#   UNIT_THREADS          threads per process (default: 3)
+#   UNIT_SPARE_PROCESSES  processes kept running when idle (default: a quarter of the processes)
+#   UNIT_IDLE_TIMEOUT     seconds before an idle process above the spare ones stops (default: 120)
+#   UNIT_PROCESS_MEMORY   MiB of memory to allow per process (default: 300)
+#   UNIT_REQUEST_TIMEOUT  seconds a request may take (default: no limit)
+#   UNIT_MAX_REQUESTS     requests a process serves before being restarted (default: no limit)
+# Set UNIT_AUTOSCALE=false to apply $UNIT_CONFIG as it is; it is also applied as it is
+# when one of the variables is invalid.
+generate_configuration() {
+  local cpus memory processes threads spare generated
+  if ! check_integer UNIT_PROCESSES 1 || ! check_integer UNIT_THREADS 1 \
+    || ! check_integer UNIT_SPARE_PROCESSES 0 || ! check_integer UNIT_PROCESS_MEMORY 1; then
+    echo "⚠️ Could not size the Unit application; applying $UNIT_CONFIG as it is"
+    return 1
+  fi
+  cpus=$(cpu_limit)
+  memory=$(memory_limit)
+
+  processes=${UNIT_PROCESSES:-$cpus}
+  if [ -z "$UNIT_PROCESSES" ] && [ $((memory / ${UNIT_PROCESS_MEMORY:-300})) -lt "$processes" ]; then
+    processes=$((memory / ${UNIT_PROCESS_MEMORY:-300}))
+  fi
+  processes=$((processes > 0 ? processes : 1))
+  threads=${UNIT_THREADS:-3}
+  spare=${UNIT_SPARE_PROCESSES:-$(((processes + 3) / 4))}
+  spare=$((spare < processes ? spare : processes))
+
+  echo "⚙️ Sizing Unit for ${cpus} CPUs and ${memory} MiB: ${processes} processes (${spare} spare) with ${threads} threads"
+
+  generated=/opt/unit/tmp/nginx-unit.json
+  if ! python3 - "$UNIT_CONFIG" "$generated" "$processes" "$threads" "$spare" <<'EOF'; then
+import json
+import os
+import sys
+
+source, target, processes, threads, spare = sys.argv[1:]
+with open(source) as f:
+    config = json.load(f)
+
+application = config["applications"]["netbox"]
+application["processes"] = {
+    "max": int(processes),
+    "spare": int(spare),
+    "idle_timeout": int(os.environ.get("UNIT_IDLE_TIMEOUT", 120)),
+}
+application["threads"] = int(threads)
+limits = {}
+if os.environ.get("UNIT_REQUEST_TIMEOUT"):
+    limits["timeout"] = int(os.environ["UNIT_REQUEST_TIMEOUT"])
+if os.environ.get("UNIT_MAX_REQUESTS"):
+    limits["requests"] = int(os.environ["UNIT_MAX_REQUESTS"])
+if limits:
+    application["limits"] = limits
+
+with open(target, "w") as f:
+    json.dump(config, f, indent=2)
+EOF
+    echo "⚠️ Could not size the Unit application; applying $UNIT_CONFIG as it is"
+    return 1
+  fi
+  UNIT_CONFIG=$generated
+}
+
 load_configuration() {
   MAX_WAIT=10
   WAIT_COUNT=0
@@ -44,6 +156,10 @@ load_configuration() {
   echo "✅ Unit configuration loaded successfully"
 }
 
+if [ "${UNIT_AUTOSCALE-true}" == "true" ]; then
+  generate_configuration
+fi
+
 load_configuration &
 
 exec unitd \
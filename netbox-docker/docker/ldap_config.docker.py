@@ -1,4 +1,4 @@
-from .configuration import read_configurations
+from .configuration import ConfigurationResolver, read_configurations
 
 _loaded_configurations = read_configurations(
     config_dir="/etc/netbox/config/ldap/",
@@ -6,18 +6,12 @@ _loaded_configurations = read_configurations(
     main_config="ldap_config",
 )
 
+_resolver = ConfigurationResolver(_loaded_configurations)
+
 
 def __getattr__(name):
-    for config in _loaded_configurations:
-        try:
-            return getattr(config, name)
-        except:
-            pass
-    raise AttributeError
+    return _resolver.resolve(name)
 
 
 def __dir__():
-    names = []
-    for config in _loaded_configurations:
-        names.extend(config.__dir__())
-    return names
+    return _resolver.names()
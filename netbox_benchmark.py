@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Load benchmark of the NetBox clients against the local fake server.
+
+Every client mode pages through the whole synthetic inventory of a
+FakeNetBoxServer (see netbox_fake) and reports throughput (sites/s), p50/p99
+request latency and the peak Python memory of the client. The server runs in
+its own process, so it doesn't compete with the client for the GIL or show
+up in the memory figures. No network access is needed.
+
+To run:
+    python netbox_benchmark.py --sites 50000 --latency 0.005
+    python run_tests.py --benchmark --sites 50000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from netbox_cache import ResponseCache
+from netbox_fake import MAX_PAGE_SIZE, FakeNetBoxServer
+from netbox_instrumentation import percentile
+from netbox_sites import DEFAULT_MAX_WORKERS, DISPLAY_FIELDS, NetBoxAPIClient
+
+try:
+    import aiohttp
+    from netbox_sites_async import AsyncNetBoxAPIClient
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+    AsyncNetBoxAPIClient = None
+
+
+DEFAULT_SITES = 50000
+BENCHMARK_TOKEN = "benchmark-token"
+
+# Errors that fail one mode (e.g. a page still failing after its retries
+# with --error-rate) without ending the benchmark
+CLIENT_ERRORS = (requests.exceptions.RequestException, asyncio.TimeoutError)
+if aiohttp is not None:
+    CLIENT_ERRORS += (aiohttp.ClientError,)
+
+
+def _serve(options, ready):
+    """Run a fake server in a child process and report its URL"""
+    server = FakeNetBoxServer(**options)
+    ready.put(server.url)
+    server.serve_forever()
+
+
+def _sync_client(url, args, **kwargs):
+    client = NetBoxAPIClient(url, BENCHMARK_TOKEN, **kwargs)
+    latencies = []
+    # requests measures the time until the response headers arrive
+    client.session.hooks["response"].append(
+        lambda response, *hook_args, **hook_kwargs: latencies.append(response.elapsed.total_seconds())
+    )
+    return client, latencies
+
+
+def run_rest(url, args, workers=1, fields=None, cached=False):
+    """Page through the inventory with NetBoxAPIClient"""
+    cache = ResponseCache(max_entries=100000, ttl=3600) if cached else None
+    client, latencies = _sync_client(url, args, max_workers=workers, cache=cache)
+    with client:
+        if cached:
+            # Warm the cache; only the second pass is measured
+            for _ in client.iter_sites(page_size=args.page_size, fields=fields):
+                pass
+            latencies.clear()
+        start = time.perf_counter()
+        total = sum(1 for _ in client.iter_sites(page_size=args.page_size, fields=fields))
+        seconds = time.perf_counter() - start
+    return total, latencies, seconds
+
+
+def run_async(url, args):
+    """Page through the inventory with AsyncNetBoxAPIClient"""
+    latencies = []
+
+    async def consume():
+        async with AsyncNetBoxAPIClient(url, BENCHMARK_TOKEN, max_concurrency=args.workers) as client:
+            request_json = client._request_json
+
+            async def timed(*request_args, **request_kwargs):
+                start = time.perf_counter()
+                try:
+                    return await request_json(*request_args, **request_kwargs)
+                finally:
+                    latencies.append(time.perf_counter() - start)
+
+            client._request_json = timed
+            total = 0
+            async for _ in client.iter_sites(page_size=args.page_size):
+                total += 1
+            return total
+
+    start = time.perf_counter()
+    total = asyncio.run(consume())
+    return total, latencies, time.perf_counter() - start
+
+
+def modes(args):
+    """Client modes to benchmark, by name"""
+    available = {
+        "rest-sequential": lambda url: run_rest(url, args, workers=1),
+        "rest-threaded": lambda url: run_rest(url, args, workers=args.workers),
+        "rest-fields": lambda url: run_rest(url, args, workers=args.workers, fields=DISPLAY_FIELDS),
+        "rest-cached": lambda url: run_rest(url, args, workers=args.workers, cached=True),
+    }
+    if AsyncNetBoxAPIClient is not None:
+        available["async"] = lambda url: run_async(url, args)
+    return available
+
+
+def measure(run, url, track_memory=True):
+    """
+    Run one benchmark mode
+
+    Args:
+        run (callable): Mode to run; returns the sites read, the request
+            latencies and the seconds of the measured pass
+        url (str): URL of the fake server
+        track_memory (bool): Track the peak Python memory with tracemalloc
+
+    Returns:
+        dict: sites, requests, seconds, throughput, p50/p99 latency (ms)
+            and peak memory (MiB, None when not tracked); only the error
+            message under "error" when the mode failed
+    """
+    if track_memory:
+        tracemalloc.start()
+    try:
+        total, latencies, seconds = run(url)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if track_memory else None
+    except CLIENT_ERRORS as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return {
+        "sites": total,
+        "requests": len(latencies),
+        "seconds": seconds,
+        "throughput": total / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_mib": peak,
+    }
+
+
+def format_report(results):
+    """Format the results (by mode name) as a table"""
+    lines = [
+        f"{'mode':<16} {'sites':>8} {'requests':>8} {'seconds':>8} {'sites/s':>10} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'peak MiB':>9}"
+    ]
+    for name, result in results.items():
+        if "error" in result:
+            lines.append(f"{name:<16} failed: {result['error']}")
+            continue
+        peak = f"{result['peak_mib']:.1f}" if result["peak_mib"] is not None else "-"
+        lines.append(
+            f"{name:<16} {result['sites']:>8} {result['requests']:>8} {result['seconds']:>8.2f} "
+            f"{result['throughput']:>10.0f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {peak:>9}"
+        )
+    return "\n".join(lines)
+
+
+def run_benchmarks(args):
+    """
+    Start the fake server and benchmark the selected modes
+
+    Returns:
+        dict: Results by mode name
+    """
+    available = modes(args)
+    selected = args.modes or list(available)
+    unknown = set(selected) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+    options = {
+        "size": args.sites,
+        "seed": args.seed,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+    }
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(options, ready), daemon=True)
+    server.start()
+    try:
+        url = ready.get(timeout=120)
+        results = {}
+        for name in selected:
+            results[name] = measure(available[name], url, track_memory=not args.no_memory)
+        return results
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NetBox clients against a local fake NetBox")
+    parser.add_argument("--sites", type=int, default=DEFAULT_SITES, help=f"Inventory size (default: {DEFAULT_SITES})")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the inventory and errors (default: 0)")
+    parser.add_argument(
+        "--page-size", type=int, default=MAX_PAGE_SIZE, help=f"Sites per page (default: {MAX_PAGE_SIZE})"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_MAX_WORKERS,
+        help=f"Parallel pages of the concurrent modes (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added by the server to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument(
+        "--modes", type=lambda value: value.split(","),
+        help="Comma-separated modes to run (default: all)",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="Don't track peak memory (tracemalloc slows the clients down)",
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        f"Benchmarking {args.sites} sites, page size {args.page_size}, "
+        f"latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}"
+    )
+    try:
+        results = run_benchmarks(args)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    print(format_report(results))
+    return 1 if any("error" in result for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Local caches for NetBox API responses.
+
+ResponseCache keeps responses in memory and DiskResponseCache keeps them as
+files under a cache directory, so repeated runs (cron, CI) can share them.
+Both expire entries after a TTL and evict the least recently used ones when
+they grow beyond max_entries. Expired entries keep their ETag/Last-Modified
+validators so the client can revalidate them with a conditional request.
+
+ChoicesCache keeps the choice fields extracted from the OPTIONS schema of an
+endpoint. They only change when NetBox is upgraded, so they are stored
+without TTL and tagged with the API version that produced them.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+# Seconds a cached response is used without asking the server
+DEFAULT_CACHE_TTL = 60
+
+# Maximum number of responses kept in the cache
+DEFAULT_CACHE_SIZE = 256
+
+
+class CacheEntry:
+    def __init__(self, body, stored_at=None, etag=None, last_modified=None):
+        """
+        A cached response
+
+        Args:
+            body (bytes): Raw response body
+            stored_at (float): Time the response was stored or revalidated
+            etag (str): ETag header sent by the server
+            last_modified (str): Last-Modified header sent by the server
+        """
+        self.body = body
+        self.stored_at = time.time() if stored_at is None else stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_response(cls, response):
+        """Build an entry from a requests.Response"""
+        return cls(
+            response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    def is_fresh(self, ttl):
+        """Tell whether the entry can be used without asking the server"""
+        return time.time() - self.stored_at < ttl
+
+    def validators(self):
+        """
+        Conditional request headers for revalidating the entry
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (may be empty)
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def json(self):
+        """Decode the cached body"""
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_CACHE_SIZE):
+        """
+        In-memory TTL/LRU cache of API responses
+
+        Args:
+            ttl (float): Seconds a response is used without asking the server
+            max_entries (int): Maximum number of responses kept
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Build a cache key from the request parts (endpoint, params, etc.)
+
+        Returns:
+            str: Stable hexadecimal key
+        """
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up an entry, fresh or expired
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            CacheEntry: The entry, or None if it isn't cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        """
+        Store an entry, evicting the least recently used ones if needed
+
+        Args:
+            key (str): Cache key
+            entry (CacheEntry): Entry to store
+        """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskResponseCache(ResponseCache):
+    def __init__(self, cache_dir, ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_CACHE_SIZE):
+        """
+        TTL/LRU cache of API responses stored as files in a directory
+
+        Each entry is one file: a JSON metadata line followed by the raw
+        body. The file modification time tracks the last use, for LRU.
+
+        Args:
+            cache_dir (str): Directory holding the cached responses
+            ttl (float): Seconds a response is used without asking the server
+            max_entries (int): Maximum number of responses kept
+        """
+        super().__init__(ttl, max_entries)
+        self.cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.cache")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            # Mark the entry as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(body, meta["stored_at"], meta.get("etag"), meta.get("last_modified"))
+
+    def set(self, key, entry):
+        meta = {
+            "stored_at": entry.stored_at,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        }
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(entry.body)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        """Remove the least recently used files beyond max_entries"""
+        with os.scandir(self.cache_dir) as it:
+            files = [f for f in it if f.name.endswith(".cache")]
+        if len(files) <= self.max_entries:
+            return
+
+        files.sort(key=lambda f: f.stat().st_mtime)
+        for f in files[: len(files) - self.max_entries]:
+            try:
+                os.remove(f.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        with os.scandir(self.cache_dir) as it:
+            for f in it:
+                if f.name.endswith(".cache"):
+                    os.remove(f.path)
+
+    def __len__(self):
+        with os.scandir(self.cache_dir) as it:
+            return sum(1 for f in it if f.name.endswith(".cache"))
+
+
+class ChoicesCache:
+    def __init__(self, path):
+        """
+        On-disk cache of the choice fields of API endpoints
+
+        All endpoints share one JSON file, keyed by endpoint URL. Each entry
+        records the API version it was read from, so it is ignored once the
+        server reports a different version. A client only learns the version
+        from a response: see discard_stale().
+
+        Args:
+            path (str): JSON file holding the cached choices
+        """
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, url, api_version=None):
+        """
+        Look up the choice fields of an endpoint
+
+        Args:
+            url (str): Endpoint URL
+            api_version (str): Current API version, if known
+
+        Returns:
+            dict: Field name -> list of choices, or None if not cached
+        """
+        entry = self._load().get(url)
+        if entry is None:
+            return None
+        if api_version and entry.get("api_version") != api_version:
+            return None
+        return entry["fields"]
+
+    def set(self, url, api_version, fields):
+        """
+        Store the choice fields of an endpoint
+
+        Args:
+            url (str): Endpoint URL
+            api_version (str): API version the schema was read from
+            fields (dict): Field name -> list of choices
+        """
+        with self._lock:
+            data = self._load()
+            data[url] = {"api_version": api_version, "fields": fields}
+            self._save(data)
+
+    def discard_stale(self, url, api_version):
+        """
+        Drop the entry of an endpoint read from another API version
+
+        Args:
+            url (str): Endpoint URL
+            api_version (str): API version the server reports now
+
+        Returns:
+            bool: Whether an entry was dropped
+        """
+        with self._lock:
+            data = self._load()
+            entry = data.get(url)
+            if entry is None or entry.get("api_version") == api_version:
+                return False
+            del data[url]
+            self._save(data)
+            return True
+
+    def _save(self, data):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
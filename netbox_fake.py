@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the NetBox sites API, for tests and benchmarks.
+
+FakeNetBoxServer serves a synthetic inventory on 127.0.0.1 with the parts of
+the NetBox REST API the clients use: the paginated /api/dcim/sites/ listing
+(status, region, tenant and last_updated__gte filters, limit/offset, brief
+and fields), the OPTIONS schema with the status choices, API-Version and
+ETag headers. Latency and errors (e.g. 503 with Retry-After) can be injected
+to see how the clients behave with slow or overloaded servers.
+
+Run it standalone to point netbox_sites.py at it:
+    python netbox_fake.py --sites 50000 --port 8000 --latency 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+
+SITES_PATH = "/api/dcim/sites/"
+
+# Status choices of the fake schema, with their share of the inventory
+STATUS_CHOICES = [
+    ("active", "Active", 0.70),
+    ("planned", "Planned", 0.10),
+    ("staging", "Staging", 0.08),
+    ("decommissioning", "Decommissioning", 0.07),
+    ("retired", "Retired", 0.05),
+]
+
+REGIONS = ["europe", "america", "asia", "africa", "oceania"]
+TENANTS = ["acme", "globex", "initech", "umbrella", None]
+
+# NetBox defaults: PAGINATE_COUNT and MAX_PAGE_SIZE
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+API_VERSION = "4.3"
+
+# Fields of the brief representation
+BRIEF_FIELDS = ("id", "url", "display", "name", "slug", "description")
+
+
+def _nested(slug, index):
+    """Build a nested region/tenant object"""
+    if slug is None:
+        return None
+    return {"id": index + 1, "url": None, "display": slug.title(), "name": slug.title(), "slug": slug}
+
+
+def make_inventory(size, seed=0):
+    """
+    Build a synthetic, reproducible site inventory
+
+    Args:
+        size (int): Number of sites
+        seed (int): Random seed; the same seed gives the same inventory
+
+    Returns:
+        list: Sites in the shape of the NetBox REST API (without url)
+    """
+    rng = random.Random(seed)
+    values = [value for value, _, _ in STATUS_CHOICES]
+    labels = {value: label for value, label, _ in STATUS_CHOICES}
+    weights = [weight for _, _, weight in STATUS_CHOICES]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    sites = []
+    for site_id in range(1, size + 1):
+        status = rng.choices(values, weights)[0]
+        region = rng.randrange(len(REGIONS))
+        tenant = rng.randrange(len(TENANTS))
+        updated = start + timedelta(seconds=rng.randrange(365 * 86400))
+        sites.append({
+            "id": site_id,
+            "display": f"Site {site_id}",
+            "name": f"Site {site_id}",
+            "slug": f"site-{site_id}",
+            "status": {"value": status, "label": labels[status]},
+            "region": _nested(REGIONS[region], region),
+            "group": None,
+            "tenant": _nested(TENANTS[tenant], tenant),
+            "facility": f"DC-{rng.randrange(1000):03d}",
+            "time_zone": "UTC",
+            "description": f"Synthetic site {site_id}",
+            "physical_address": f"{rng.randrange(1, 999)} Example Street",
+            "shipping_address": "",
+            "latitude": round(rng.uniform(-90, 90), 6),
+            "longitude": round(rng.uniform(-180, 180), 6),
+            "comments": "",
+            "tags": [],
+            "custom_fields": {},
+            "created": start.isoformat().replace("+00:00", "Z"),
+            "last_updated": updated.isoformat().replace("+00:00", "Z"),
+        })
+    return sites
+
+
+class FakeNetBoxHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Keep test and benchmark output quiet"""
+
+    def _send_json(self, status, payload=None, headers=None):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8") if payload is not None else b""
+        self._send(status, body, headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("API-Version", API_VERSION)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _prepare(self):
+        """
+        Apply the injected latency and errors and check the token
+
+        Returns:
+            bool: Whether the request should be answered normally
+        """
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+        if server.should_fail():
+            self._send_json(
+                server.error_status,
+                {"detail": "Injected error"},
+                {"Retry-After": str(server.retry_after)},
+            )
+            return False
+        if not self.headers.get("Authorization", "").startswith("Token "):
+            self._send_json(403, {"detail": "Authentication credentials were not provided."})
+            return False
+        if urlsplit(self.path).path != SITES_PATH:
+            self._send_json(404, {"detail": "Not found."})
+            return False
+        return True
+
+    def do_OPTIONS(self):
+        if not self._prepare():
+            return
+        self._send_json(200, self.server.schema)
+
+    def do_GET(self):
+        if not self._prepare():
+            return
+
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            limit = min(int(query.get("limit", [DEFAULT_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+            offset = int(query.get("offset", [0])[0])
+        except ValueError:
+            self._send_json(400, {"detail": "Invalid limit or offset."})
+            return
+        if limit <= 0:
+            limit = MAX_PAGE_SIZE
+
+        sites = self.server.filter_sites(query)
+        page = sites[offset:offset + limit]
+
+        if query.get("brief", [""])[0].lower() in ("true", "1"):
+            fields = BRIEF_FIELDS
+        elif query.get("fields"):
+            fields = query["fields"][0].split(",")
+        else:
+            fields = None
+        if fields:
+            page = [{field: site[field] for field in fields if field in site} for site in page]
+
+        def link(page_offset):
+            params = {key: values for key, values in query.items() if key != "offset"}
+            params["limit"] = [limit]
+            params["offset"] = [page_offset]
+            return f"{self.server.url}{SITES_PATH}?{urlencode(params, doseq=True)}"
+
+        payload = {
+            "count": len(sites),
+            "next": link(offset + limit) if offset + limit < len(sites) else None,
+            "previous": link(max(0, offset - limit)) if offset > 0 else None,
+            "results": page,
+        }
+
+        # Same ETag for the same results, so clients can revalidate
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", {"ETag": etag})
+            return
+        self._send(200, body, {"ETag": etag})
+
+
+class FakeNetBoxServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        sites=None,
+        size=1000,
+        seed=0,
+        latency=0.0,
+        error_rate=0.0,
+        error_status=503,
+        retry_after=0,
+        port=0,
+    ):
+        """
+        Start listening on 127.0.0.1 with a synthetic inventory
+
+        Args:
+            sites (list): Sites to serve (default: make_inventory(size, seed))
+            size (int): Number of synthetic sites when no sites are given
+            seed (int): Seed of the inventory and of the injected errors
+            latency (float): Seconds added to every request
+            error_rate (float): Share of requests answered with error_status
+            error_status (int): Status of the injected errors (429, 503, ...)
+            retry_after (int): Retry-After seconds sent with injected errors
+            port (int): Port to listen on (default: a free one)
+        """
+        super().__init__(("127.0.0.1", port), FakeNetBoxHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.sites = sites if sites is not None else make_inventory(size, seed)
+        for site in self.sites:
+            site.setdefault("url", f"{self.url}{SITES_PATH}{site['id']}/")
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.requests = 0
+        self.schema = {
+            "name": "Site List",
+            "actions": {"POST": {"status": {
+                "type": "choice",
+                "choices": [{"value": value, "display": label} for value, label, _ in STATUS_CHOICES],
+            }}},
+        }
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # Filtered listings by query, so paging through 50k sites stays cheap
+        self._filtered = {}
+        self._thread = None
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def should_fail(self):
+        """Whether the current request gets an injected error"""
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def filter_sites(self, query):
+        """
+        Find the sites matching the filters of a query
+
+        Args:
+            query (dict): Parsed query string (lists of values)
+
+        Returns:
+            list: Matching sites, ordered by id
+        """
+        statuses = frozenset(query.get("status", []))
+        regions = frozenset(query.get("region", []))
+        tenants = frozenset(query.get("tenant", []))
+        since = query.get("last_updated__gte", [None])[0]
+        key = (statuses, regions, tenants, since)
+
+        with self._lock:
+            sites = self._filtered.get(key)
+        if sites is not None:
+            return sites
+
+        sites = [
+            site for site in self.sites
+            if (not statuses or site["status"]["value"] in statuses)
+            and (not regions or (site["region"] or {}).get("slug") in regions)
+            and (not tenants or (site["tenant"] or {}).get("slug") in tenants)
+            and (since is None or site["last_updated"] >= since)
+        ]
+        with self._lock:
+            self._filtered[key] = sites
+        return sites
+
+    def start(self):
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake NetBox sites API")
+    parser.add_argument("--sites", type=int, default=1000, help="Number of synthetic sites (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the inventory (default: 0)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="Status of the injected errors")
+    args = parser.parse_args()
+
+    server = FakeNetBoxServer(
+        size=args.sites,
+        seed=args.seed,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        port=args.port,
+    )
+    print(f"Fake NetBox with {len(server.sites)} sites on {server.url} (any token works)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
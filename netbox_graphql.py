@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+GraphQL backend for querying NetBox sites.
+
+NetBox exposes a GraphQL API at /graphql/ (GRAPHQL_ENABLED=true). Unlike the
+REST API, one GraphQL request can return sites together with their region,
+tenant and devices, with only the selected fields. GraphQLSiteBackend builds
+those queries and pages through site_list with the same iterator interface
+as NetBoxAPIClient.iter_sites().
+"""
+
+import re
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+
+
+# Sites per GraphQL page by default
+DEFAULT_GRAPHQL_PAGE_SIZE = 100
+
+# Fields selected when the caller doesn't choose any
+DEFAULT_GRAPHQL_FIELDS = ["id", "name", "slug", "status", "description"]
+
+# Fields that map to related objects instead of plain site attributes.
+# The GraphQL schema has no device count for sites, so device_count fetches
+# the id of every device of every site and counts them: its payload grows
+# with the number of devices, unlike the other fields
+RELATED_FIELDS = {
+    "region": "region { id name slug }",
+    "tenant": "tenant { id name slug }",
+    "group": "group { id name slug }",
+    "device_count": "devices { id }",
+}
+
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class GraphQLError(requests.exceptions.RequestException):
+    """The GraphQL API answered with errors"""
+
+
+def _literal(value):
+    """Render a Python value (str, number, bool, list, dict) as a GraphQL input literal"""
+    if isinstance(value, Mapping):
+        return "{" + ", ".join(f"{_name(key)}: {_literal(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_literal(item) for item in value) + "]"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _name(value):
+    """Check that a field or argument name is a valid GraphQL name"""
+    if not _NAME_RE.match(value):
+        raise ValueError(f"Invalid GraphQL name: {value!r}")
+    return value
+
+
+def build_site_query(
+    fields=None, status=None, filters=None, offset=0, limit=DEFAULT_GRAPHQL_PAGE_SIZE
+):
+    """
+    Build the GraphQL query of a page of sites
+
+    Args:
+        fields (list): Site fields to select; region, tenant, group and
+            device_count select the related objects (device_count downloads
+            the id of each device, so it costs O(devices))
+        status (str | list): Status or statuses to filter (active, planned, etc.)
+        filters (dict): Extra filters, in NetBox GraphQL filter syntax
+            (e.g. {"region": {"slug": {"exact": "europe"}}})
+        offset (int): Sites to skip
+        limit (int): Sites per page
+
+    Returns:
+        str: GraphQL query
+    """
+    selection = " ".join(
+        RELATED_FIELDS.get(field) or _name(field) for field in fields or DEFAULT_GRAPHQL_FIELDS
+    )
+
+    conditions = [f"{_name(key)}: {_literal(value)}" for key, value in (filters or {}).items()]
+    statuses = [status] if isinstance(status, str) else list(status or [])
+
+    # Statuses are an enum in the GraphQL schema (STATUS_ACTIVE, ...). Several
+    # statuses become nested OR branches, each one repeating the other filters
+    branches = [
+        conditions + [f"status: {_name('STATUS_' + value.upper())}"] for value in statuses
+    ] or [conditions]
+    site_filters = ""
+    for branch in reversed(branches):
+        if site_filters:
+            branch = branch + [f"OR: {{{site_filters}}}"]
+        site_filters = ", ".join(branch)
+
+    arguments = f"pagination: {{offset: {int(offset)}, limit: {int(limit)}}}"
+    if site_filters:
+        arguments = f"filters: {{{site_filters}}}, {arguments}"
+
+    return f"query {{ site_list({arguments}) {{ {selection} }} }}"
+
+
+def normalize_site(site):
+    """
+    Give a GraphQL site the same shape as a REST one
+
+    The status becomes a {value, label} dict and the devices list becomes
+    device_count, so the rest of the tools don't care about the backend.
+
+    Args:
+        site (dict): Site as returned by GraphQL
+
+    Returns:
+        dict: The same site, modified in place
+    """
+    status = site.get("status")
+    if isinstance(status, str):
+        value = status.lower()
+        if value.startswith("status_"):
+            value = value[len("status_"):]
+        site["status"] = {"value": value, "label": value.replace("_", " ").title()}
+    if "devices" in site:
+        site["device_count"] = len(site.pop("devices") or [])
+    if "id" in site:
+        site["id"] = int(site["id"])
+    return site
+
+
+class GraphQLSiteBackend:
+    def __init__(self, client):
+        """
+        Initialize the GraphQL backend of a client
+
+        The backend shares the HTTP session (and token), retries and rate
+        limiting of the client.
+
+        Args:
+            client (NetBoxAPIClient): Client connected to NetBox
+        """
+        self.client = client
+        self.url = urljoin(client.base_url, "/graphql/")
+
+    def query(self, query):
+        """
+        Run a GraphQL query
+
+        Args:
+            query (str): GraphQL query
+
+        Returns:
+            dict: The data of the response
+
+        Raises:
+            GraphQLError: If the response contains errors
+            requests.exceptions.RequestException: If the request fails
+        """
+        with self.client._instrument("post", self.url) as event:
+            response = self.client._request("post", self.url, event, json={"query": query})
+            response.raise_for_status()
+            payload = self.client._decode(response, event)
+        if payload.get("errors"):
+            messages = "; ".join(error.get("message", "") for error in payload["errors"])
+            raise GraphQLError(f"GraphQL query failed: {messages}")
+        return payload.get("data") or {}
+
+    def _get_page(self, fields, status, filters, offset, limit):
+        data = self.query(build_site_query(fields, status, filters, offset, limit))
+        return data.get("site_list") or []
+
+    def iter_sites(self, status=None, page_size=None, filters=None, fields=None):
+        """
+        Iterate over the sites matching a status as each page arrives
+
+        GraphQL pages don't tell the total, so the next page is requested
+        while the current one is consumed, until a short page arrives.
+
+        Args:
+            status (str): Status to filter (active, planned, decommissioning, etc.)
+            page_size (int): Sites per page (default: DEFAULT_GRAPHQL_PAGE_SIZE)
+            filters (dict): Extra filters, in NetBox GraphQL filter syntax
+            fields (list): Site fields to select (default: DEFAULT_GRAPHQL_FIELDS)
+
+        Yields:
+            dict: Each site that matches, in the same shape as the REST API
+
+        Raises:
+            requests.exceptions.RequestException: If a page can't be fetched
+        """
+        limit = page_size or DEFAULT_GRAPHQL_PAGE_SIZE
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            offset = 0
+            page = executor.submit(self._get_page, fields, status, filters, offset, limit)
+            while page is not None:
+                sites = page.result()
+                offset += limit
+                page = None
+                if len(sites) == limit:
+                    page = executor.submit(self._get_page, fields, status, filters, offset, limit)
+                for site in sites:
+                    yield normalize_site(site)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Request-level instrumentation of NetBoxAPIClient.
+
+Hooks passed to the client (hooks=[...] or client.add_hook()) are called once
+per API call with a RequestEvent: the time spent opening connections (DNS,
+TCP and TLS), waiting for the first byte, downloading and decoding the body,
+plus bytes, status code, retries and cache hit/miss. Two hooks are provided:
+
+- Profiler: aggregates the events per endpoint and prints a summary
+- NDJSONExporter: writes every event as one JSON line for later analysis
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+
+# Seconds spent opening connections, per thread (read before and after a request)
+_connect_time = threading.local()
+
+
+def connect_time():
+    """Seconds the current thread has spent opening connections so far"""
+    return getattr(_connect_time, "seconds", 0.0)
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_time.seconds = connect_time() + time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    """HTTP connection that measures how long connecting takes"""
+
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    """HTTPS connection that measures how long connecting (and TLS) takes"""
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections report their connect time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile
+
+    Args:
+        values (list): Measurements
+        percent (float): Percentile (0-100)
+
+    Returns:
+        float: The percentile, or 0 without measurements
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RequestEvent:
+    # Phases timed for every request, in seconds
+    TIMINGS = ("connect", "ttfb", "download", "decode", "total")
+
+    def __init__(self, method, endpoint):
+        """
+        Timings and outcome of one API call
+
+        Retries are part of the same event: attempts counts them, connect
+        adds up every attempt and ttfb/download are the ones of the last
+        attempt. total goes from the call to the decoded result.
+
+        Args:
+            method (str): HTTP method (GET, OPTIONS, POST)
+            endpoint (str): Path of the endpoint (e.g. /api/dcim/sites/)
+        """
+        self.method = method
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        self.status = None
+        self.bytes = 0
+        self.attempts = 0
+        # "hit", "miss" or "revalidated"; None when the cache is disabled
+        self.cache = None
+        self.error = None
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self.download = 0.0
+        self.decode = 0.0
+        self.total = 0.0
+        self._start = time.perf_counter()
+
+    def record_response(self, response, seconds, connect=0.0):
+        """
+        Record an attempt
+
+        Args:
+            response (requests.Response): Response received
+            seconds (float): Time spent in the session call
+            connect (float): Part of it spent opening connections
+        """
+        self.attempts += 1
+        self.status = response.status_code
+        self.bytes = len(response.content or b"")
+        self.connect += connect
+        # requests measures elapsed until the headers are parsed, which
+        # includes opening the connection
+        elapsed = response.elapsed.total_seconds()
+        self.ttfb = max(0.0, elapsed - connect)
+        self.download = max(0.0, seconds - elapsed)
+
+    def finish(self):
+        """Stop the clock"""
+        self.total = time.perf_counter() - self._start
+
+    def to_dict(self):
+        """The event as a JSON-serializable dict (timings in milliseconds)"""
+        event = {
+            "started_at": self.started_at,
+            "method": self.method,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "bytes": self.bytes,
+            "attempts": self.attempts,
+            "cache": self.cache,
+            "error": self.error,
+        }
+        for timing in self.TIMINGS:
+            event[f"{timing}_ms"] = round(getattr(self, timing) * 1000, 3)
+        return event
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Hook that aggregates request events per endpoint
+
+        Pass it to the client (hooks=[profiler]) and print profiler.report()
+        once the work is done.
+        """
+        self.endpoints = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        key = f"{event.method} {event.endpoint}"
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "cache_hits": 0,
+                    "bytes": 0,
+                    "totals": [],
+                    **{timing: 0.0 for timing in RequestEvent.TIMINGS},
+                }
+            stats["requests"] += 1
+            stats["errors"] += event.error is not None or (event.status or 0) >= 400
+            stats["retries"] += max(0, event.attempts - 1)
+            stats["cache_hits"] += event.cache == "hit"
+            stats["bytes"] += event.bytes
+            stats["totals"].append(event.total)
+            for timing in RequestEvent.TIMINGS:
+                stats[timing] += getattr(event, timing)
+
+    def report(self):
+        """
+        Summary per endpoint: counts, bytes, average time of each phase and
+        p50/p99 of the total time
+
+        Returns:
+            str: The summary as a table
+        """
+        lines = [
+            f"{'endpoint':<28} {'requests':>8} {'errors':>6} {'retries':>7} {'cached':>6} {'MiB':>8} "
+            f"{'connect':>8} {'ttfb':>8} {'download':>8} {'decode':>8} {'p50':>8} {'p99':>8}",
+        ]
+        with self._lock:
+            for key, stats in self.endpoints.items():
+                count = stats["requests"]
+                averages = " ".join(
+                    f"{stats[timing] / count * 1000:>8.1f}" for timing in ("connect", "ttfb", "download", "decode")
+                )
+                lines.append(
+                    f"{key:<28} {count:>8} {stats['errors']:>6} {stats['retries']:>7} "
+                    f"{stats['cache_hits']:>6} {stats['bytes'] / 2 ** 20:>8.2f} {averages} "
+                    f"{percentile(stats['totals'], 50) * 1000:>8.1f} {percentile(stats['totals'], 99) * 1000:>8.1f}"
+                )
+        lines.append("(times in ms: averages per phase, p50/p99 of the total)")
+        return "\n".join(lines)
+
+
+class NDJSONExporter:
+    def __init__(self, path):
+        """
+        Hook that writes every request event as a JSON line
+
+        Args:
+            path (str): File to append the events to
+        """
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event.to_dict(), separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        """Flush and close the file"""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Streaming output formats for NetBox sites.
+
+Each writer receives the sites one by one, as they arrive from the client,
+and writes them to a single binary stream: one write() call per site, no
+print() and no string building across sites. JSON is serialized with orjson
+when it is installed and YAML with the libyaml (C) dumper when available.
+Supported formats: text (the classic readable listing), json, ndjson, csv
+and yaml.
+"""
+
+import csv
+import io
+import json
+from collections.abc import Sized
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - optional dependency
+    yaml = None
+
+
+# Output formats accepted by get_writer() / write_sites()
+FORMATS = ("text", "json", "ndjson", "csv", "yaml")
+
+# Site fields of the text listing, also the csv columns when no fields are given
+DISPLAY_FIELDS = ["id", "name", "slug", "status", "description", "url"]
+
+TEXT_TEMPLATE = (
+    "ID: {id}\n"
+    "Name: {name}\n"
+    "Slug: {slug}\n"
+    "Status: {status}\n"
+    "Description: {description}\n"
+    "URL: {url}\n"
+    + "-" * 40
+    + "\n"
+)
+
+
+if orjson is not None:
+    def _dumps(value):
+        return orjson.dumps(value)
+else:
+    def _dumps(value):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _scalar(value):
+    """
+    Flatten a site value for csv columns
+
+    Nested objects become their value/slug/name, lists are joined with
+    commas and None becomes an empty cell.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        for key in ("value", "slug", "name", "display", "id"):
+            if key in value:
+                return value[key]
+        return json.dumps(value)
+    if isinstance(value, list):
+        return ",".join(str(_scalar(item)) for item in value)
+    return value
+
+
+class SiteWriter:
+    def __init__(self, stream, status=None, fields=None):
+        """
+        Base class of the output writers
+
+        Args:
+            stream (BinaryIO): Buffered binary stream to write to
+            status (str | list): Queried status or statuses (text title)
+            fields (list): Fields to write (csv columns)
+        """
+        self.stream = stream
+        self.status = status if not status or isinstance(status, str) else ", ".join(status)
+        self.fields = fields
+        self.count = 0
+
+    def begin(self):
+        """Write whatever precedes the first site"""
+
+    def write(self, site):
+        """Write one site"""
+        raise NotImplementedError
+
+    def end(self):
+        """Write whatever follows the last site"""
+
+    def write_all(self, sites):
+        """
+        Write every site of an iterable
+
+        Args:
+            sites (iterable): Sites, consumed lazily
+
+        Returns:
+            int: Number of sites written
+        """
+        self.begin()
+        write = self.write
+        for site in sites:
+            write(site)
+            self.count += 1
+        self.end()
+        self.stream.flush()
+        return self.count
+
+
+class TextWriter(SiteWriter):
+    """
+    Readable listing of the sites
+
+    The total goes in the title for lists and after the last site for
+    iterators, whose length is only known at the end.
+    """
+
+    def write_all(self, sites):
+        self.total = len(sites) if isinstance(sites, Sized) else None
+        return super().write_all(sites)
+
+    def begin(self):
+        title = "Sites found"
+        if self.status:
+            title += f" with status '{self.status}'"
+        if self.total is not None:
+            title += f" ({self.total} sites)"
+        self._header = f"\n{title}:\n{'=' * 60}\n".encode("utf-8")
+
+    def write(self, site):
+        if self.count == 0:
+            self.stream.write(self._header)
+        self.stream.write(
+            TEXT_TEMPLATE.format(
+                id=site.get("id", "N/A"),
+                name=site.get("name", "N/A"),
+                slug=site.get("slug", "N/A"),
+                status=(site.get("status") or {}).get("label", "N/A"),
+                description=site.get("description", "N/A"),
+                url=site.get("url", "N/A"),
+            ).encode("utf-8")
+        )
+
+    def end(self):
+        if self.count:
+            if self.total is None:
+                self.stream.write(f"Total: {self.count} sites\n".encode("utf-8"))
+        elif self.status:
+            self.stream.write(f"No sites found with status '{self.status}'\n".encode("utf-8"))
+        else:
+            self.stream.write(b"No sites found\n")
+
+
+class JSONWriter(SiteWriter):
+    """A single JSON array, streamed element by element"""
+
+    def begin(self):
+        self.stream.write(b"[")
+
+    def write(self, site):
+        if self.count:
+            self.stream.write(b",\n")
+        self.stream.write(_dumps(site))
+
+    def end(self):
+        self.stream.write(b"]\n")
+
+
+class NDJSONWriter(SiteWriter):
+    """One JSON document per line"""
+
+    def write(self, site):
+        self.stream.write(_dumps(site) + b"\n")
+
+
+class CSVWriter(SiteWriter):
+    """Comma-separated values with a header row"""
+
+    def begin(self):
+        self.columns = self.fields or DISPLAY_FIELDS
+        # csv needs a text stream; it writes straight through to the binary one
+        self._text = io.TextIOWrapper(self.stream, encoding="utf-8", newline="", write_through=True)
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(self.columns)
+
+    def write(self, site):
+        self._writer.writerow([_scalar(site.get(column)) for column in self.columns])
+
+    def end(self):
+        self._text.flush()
+        # Give the binary stream back without closing it
+        self._text.detach()
+
+
+class YAMLWriter(SiteWriter):
+    """A YAML sequence, one item emitted per site"""
+
+    def begin(self):
+        if yaml is None:
+            raise ImportError("The yaml format requires PyYAML (pip install pyyaml)")
+        self._dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+    def write(self, site):
+        self.stream.write(
+            yaml.dump([site], Dumper=self._dumper, sort_keys=False, allow_unicode=True).encode("utf-8")
+        )
+
+    def end(self):
+        if not self.count:
+            self.stream.write(b"[]\n")
+
+
+WRITERS = {
+    "text": TextWriter,
+    "json": JSONWriter,
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+    "yaml": YAMLWriter,
+}
+
+
+def get_writer(output_format, stream, status=None, fields=None):
+    """
+    Build the writer of an output format
+
+    Args:
+        output_format (str): One of FORMATS
+        stream (BinaryIO): Buffered binary stream to write to
+        status (str | list): Queried status or statuses (text title)
+        fields (list): Fields to write (csv columns)
+
+    Returns:
+        SiteWriter: The writer
+    """
+    try:
+        writer_class = WRITERS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown format '{output_format}', use one of: {', '.join(FORMATS)}")
+    return writer_class(stream, status, fields)
+
+
+def write_sites(sites, output_format, stream, status=None, fields=None):
+    """
+    Write sites in an output format as they are consumed
+
+    Args:
+        sites (iterable): Sites (an iterator is consumed lazily)
+        output_format (str): One of FORMATS
+        stream (BinaryIO): Buffered binary stream to write to
+        status (str | list): Queried status or statuses (text title)
+        fields (list): Fields to write (csv columns)
+
+    Returns:
+        int: Number of sites written
+    """
+    return get_writer(output_format, stream, status, fields).write_all(sites)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Retry, rate limiting and circuit breaking for the NetBox API clients.
+
+NetBox runs behind a small pool of Unit processes and answers 429/502/503
+when it is overloaded. These helpers keep one transient error from failing a
+whole job without making things worse for the server:
+
+- RetryPolicy: jittered exponential backoff that honors Retry-After
+- RateLimiter: token bucket shared by every thread and asyncio task of a job
+- CircuitBreaker: stops sending requests for a while after repeated failures
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+# Responses worth retrying: rate limited or the server/proxy is overloaded
+RETRY_STATUSES = (429, 502, 503, 504)
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+
+# Longest Retry-After honored; a server asking for more is not retried
+DEFAULT_MAX_RETRY_AFTER = 60.0
+
+# Consecutive failures that open the circuit, and seconds it stays open
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """The circuit breaker is open: the request was not sent"""
+
+
+def parse_retry_after(value):
+    """
+    Read a Retry-After header
+
+    Args:
+        value (str): Seconds to wait or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the value is missing or invalid
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        statuses=RETRY_STATUSES,
+        max_retry_after=DEFAULT_MAX_RETRY_AFTER,
+    ):
+        """
+        Decide whether and when a failed request is sent again
+
+        Args:
+            max_retries (int): Retries after the first attempt (0 disables them)
+            backoff_factor (float): Base delay in seconds, doubled per retry
+            max_backoff (float): Upper bound of the exponential delay
+            statuses (tuple): HTTP statuses that are retried
+            max_retry_after (float): Longest Retry-After waited for; the
+                request gives up when the server asks for more
+        """
+        self.max_retries = max(0, max_retries)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = tuple(statuses)
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, attempt, retry_after=None):
+        """
+        Whether another attempt is allowed after `attempt` retries
+
+        Args:
+            attempt (int): Retries done so far
+            retry_after (float): Seconds asked by the server, if any
+        """
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return False
+        return attempt < self.max_retries
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before the next attempt
+
+        Uses "full jitter" (a random delay up to the exponential backoff) so
+        clients that failed together don't come back together. The server's
+        Retry-After, when given, is a lower bound.
+
+        Args:
+            attempt (int): Retries done so far (0 for the first retry)
+            retry_after (float): Seconds asked by the server, if any
+
+        Returns:
+            float: Seconds to wait
+        """
+        backoff = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        delay = random.uniform(0, backoff)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=None):
+        """
+        Token bucket limiting the requests sent per second
+
+        The bucket is thread-safe, and the same instance can be shared by
+        several clients, threads and asyncio tasks.
+
+        Args:
+            rate (float): Requests per second allowed on average
+            burst (int): Requests that can be sent at once (default: rate,
+                at least 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and return the seconds to wait until it is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative: later callers queue behind this one
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Wait (blocking the thread) until a request may be sent"""
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be sent"""
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    # States of the breaker
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        """
+        Stop sending requests to a server that keeps failing
+
+        After failure_threshold consecutive failures the circuit opens and
+        requests fail at once with CircuitOpenError. After reset_timeout
+        seconds one trial request is let through (half-open): a success
+        closes the circuit again, a failure keeps it open. Every request let
+        through must end with record_success(), record_failure() or
+        record_error(), otherwise the circuit stays half-open.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds before a trial request is allowed
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Check that a request may be sent
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining <= 0:
+                    # Let this request through as the trial one
+                    self.state = self.HALF_OPEN
+                    return
+            else:
+                # A trial request is already in flight
+                remaining = self.reset_timeout
+            raise CircuitOpenError(
+                f"NetBox is failing, requests paused for {remaining:.0f}s "
+                f"after {self.failures} consecutive failures"
+            )
+
+    def record_success(self):
+        """Close the circuit after a successful request"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        """Count a failed request, opening the circuit if needed"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_error(self, error):
+        """
+        Record a request that raised instead of returning a response
+
+        Errors count as failures. A cancelled request (asyncio.CancelledError,
+        KeyboardInterrupt) tells nothing about the server: if it was the
+        trial, the next request becomes the trial instead.
+
+        Args:
+            error (BaseException): What the request raised
+        """
+        if isinstance(error, Exception):
+            self.record_failure()
+            return
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
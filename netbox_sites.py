@@ -6,19 +6,95 @@ Requirements: requests, python-dotenv (optional)
 
 import requests
 import json
+import os
 import sys
-from urllib.parse import urljoin
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlsplit
 import argparse
+import io
+import time
+
+from netbox_cache import (
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    CacheEntry,
+    ChoicesCache,
+    DiskResponseCache,
+)
+from netbox_graphql import GraphQLSiteBackend
+from netbox_instrumentation import InstrumentedHTTPAdapter, NDJSONExporter, Profiler, RequestEvent, connect_time
+from netbox_output import DISPLAY_FIELDS, FORMATS, write_sites
+from netbox_retry import DEFAULT_MAX_RETRIES, CircuitBreaker, RateLimiter, RetryPolicy, parse_retry_after
+from netbox_snapshot import SiteSnapshot, format_age
+from netbox_sync import SiteSync
+
+
+# Maximum number of pages fetched in parallel by default
+DEFAULT_MAX_WORKERS = 8
+
+# Statuses returned when the API schema can't be read
+DEFAULT_STATUSES = ["active", "staging", "planned", "decommissioning", "retired"]
+
+# File where the CLI keeps the choice fields read from the API schema
+DEFAULT_CHOICES_CACHE = "~/.cache/netbox_sites/choices.json"
+
+# SQLite file where the CLI keeps the local snapshot of sites
+DEFAULT_SNAPSHOT = "~/.cache/netbox_sites/sites.sqlite3"
+
+# Backends that can answer site queries
+BACKENDS = ("rest", "graphql")
+
+# Number of connection pools (one per host) kept by the HTTP session
+DEFAULT_POOL_CONNECTIONS = 10
 
 
 class NetBoxAPIClient:
-    def __init__(self, base_url, api_token):
+    def __init__(
+        self,
+        base_url,
+        api_token,
+        max_workers=DEFAULT_MAX_WORKERS,
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=None,
+        pool_block=False,
+        keep_alive=True,
+        cache=None,
+        choices_cache=None,
+        retry=None,
+        rate_limiter=None,
+        circuit_breaker=None,
+        hooks=None,
+    ):
         """
         Initialize the NetBox API client
 
+        The client owns a requests.Session so TCP/TLS connections are reused
+        between calls. Use it as a context manager (or call close()) to
+        release the pooled connections.
+
         Args:
             base_url (str): NetBox base URL (e.g., http://localhost:8000)
             api_token (str): NetBox API token
+            max_workers (int): Maximum number of pages fetched in parallel
+            pool_connections (int): Number of host pools kept by the session
+            pool_maxsize (int): Connections kept per host (default: max_workers)
+            pool_block (bool): Wait for a free connection instead of opening
+                an extra, non-pooled one when the pool is exhausted
+            keep_alive (bool): Keep connections open between requests
+            cache (ResponseCache): Optional cache of responses (see
+                netbox_cache); disabled by default
+            choices_cache (ChoicesCache): Optional on-disk cache of the
+                choice fields read from the OPTIONS schema
+            retry (RetryPolicy): Retries of 429/5xx responses and connection
+                errors (default: RetryPolicy(); see netbox_retry)
+            rate_limiter (RateLimiter): Optional token bucket limiting the
+                requests per second; can be shared with other clients
+            circuit_breaker (CircuitBreaker): Pauses requests when NetBox
+                keeps failing (default: CircuitBreaker())
+            hooks (list): Callables receiving a RequestEvent after every
+                API call (see netbox_instrumentation)
         """
         self.base_url = base_url.rstrip("/")
         self.api_url = urljoin(self.base_url, "/api/")
@@ -29,31 +105,398 @@ class NetBoxAPIClient:
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.choices_cache = choices_cache
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.hooks = list(hooks or [])
+        # API version reported by the server, once a response has been seen
+        self.api_version = None
+        if pool_maxsize is None:
+            pool_maxsize = self.max_workers
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        adapter = InstrumentedHTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.graphql = GraphQLSiteBackend(self)
+
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_hook(self, hook):
+        """
+        Call a hook after every API call
+
+        Args:
+            hook (callable): Receives a RequestEvent (see netbox_instrumentation)
+        """
+        self.hooks.append(hook)
 
-    def get_sites_by_status(self, status=None):
+    @contextmanager
+    def _instrument(self, method, url):
         """
-        Query sites by specific status
+        Time an API call and pass its RequestEvent to the hooks
+
+        Yields:
+            RequestEvent: Event to fill, or None when there are no hooks
+        """
+        if not self.hooks:
+            yield None
+            return
+
+        event = RequestEvent(method.upper(), urlsplit(url).path)
+        try:
+            yield event
+        except Exception as e:
+            event.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            event.finish()
+            for hook in self.hooks:
+                hook(event)
+
+    def _decode(self, response, event=None):
+        """Decode a JSON response, timing it for the event if any"""
+        if event is None:
+            return response.json()
+        start = time.perf_counter()
+        try:
+            return response.json()
+        finally:
+            event.decode += time.perf_counter() - start
+
+    def _request(self, method, url, event=None, **kwargs):
+        """
+        Send a request through the rate limiter, circuit breaker and retries
+
+        Only read requests are sent (GET, OPTIONS, GraphQL queries), so they
+        are all safe to retry. 429/5xx responses that are still failing
+        after the last retry are returned for the caller to raise.
 
         Args:
-            status (str): Status to filter (active, planned, decommissioning, etc.)
+            method (str): HTTP method in lowercase (get, options, post)
+            url (str): URL to request
+            event (RequestEvent): Event recording the attempts, if any
+            **kwargs: Arguments of the session method (params, headers, json)
 
         Returns:
-            list: List of sites that match the status
+            requests.Response: The response
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            requests.exceptions.RequestException: If the request fails
         """
+        # The breaker sees one outcome per call, once the retries are over:
+        # pages fetched in parallel that each hit a transient error must not
+        # add up to an open circuit while their retries would succeed
+        self.circuit_breaker.before_request()
         try:
-            # Query parameters
-            params = {}
-            if status:
-                params["status"] = status
+            response = self._send(method, url, event, **kwargs)
+        except BaseException as e:
+            self.circuit_breaker.record_error(e)
+            raise
+        if response.status_code in self.retry.statuses:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        return response
+
+    def _send(self, method, url, event=None, **kwargs):
+        """Send a request through the rate limiter, retrying it as needed"""
+        send = getattr(self.session, method)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            try:
+                if event is None:
+                    response = send(url, **kwargs)
+                else:
+                    connected = connect_time()
+                    start = time.perf_counter()
+                    response = send(url, **kwargs)
+                    event.record_response(
+                        response, time.perf_counter() - start, connect_time() - connected
+                    )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not self.retry.should_retry(attempt):
+                    raise
+                time.sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in self.retry.statuses:
+                return response
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if not self.retry.should_retry(attempt, retry_after):
+                return response
+            response.close()
+            time.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def _get_page(self, params):
+        """
+        Fetch a single page of the sites endpoint
+
+        Args:
+            params (dict): Query parameters (filters, limit, offset)
 
-            # Make GET request
-            response = requests.get(self.url, headers=self.headers, params=params)
+        Returns:
+            dict: Decoded page (count, next, previous, results)
+        """
+        with self._instrument("get", self.url) as event:
+            if self.cache is None:
+                response = self._request("get", self.url, event, params=params)
+                response.raise_for_status()
+                self._remember_api_version(response)
+                return self._decode(response, event)
+
+            # The token is part of the key: permissions may change the results
+            key = self.cache.make_key(self.url, params, self.headers["Authorization"])
+            entry = self.cache.get(key)
+            if entry is not None and entry.is_fresh(self.cache.ttl):
+                if event is not None:
+                    event.cache = "hit"
+                return self._decode(entry, event)
+
+            # Revalidate an expired entry if the server gave us validators
+            headers = entry.validators() if entry is not None else {}
+            response = self._request("get", self.url, event, params=params, headers=headers)
+            if response.status_code == 304 and entry is not None:
+                if event is not None:
+                    event.cache = "revalidated"
+                self.cache.set(key, CacheEntry(entry.body, None, entry.etag, entry.last_modified))
+                return self._decode(entry, event)
+
+            if event is not None:
+                event.cache = "miss"
             response.raise_for_status()
+            self._remember_api_version(response)
+            data = self._decode(response, event)
+            self.cache.set(key, CacheEntry.from_response(response))
+            return data
 
-            # Parse JSON response
-            data = response.json()
+    def _remember_api_version(self, response):
+        """
+        Keep the API version reported in the response headers
 
-            return data.get("results", [])
+        Choices cached before the client knew the version (e.g. read from
+        disk at the start of a CLI run) are dropped if they come from another
+        version, so the next call reads the schema of the upgraded server.
+        """
+        api_version = response.headers.get("API-Version")
+        if isinstance(api_version, str):
+            if api_version != self.api_version and self.choices_cache is not None:
+                self.choices_cache.discard_stale(self.url, api_version)
+            self.api_version = api_version
+
+    def _build_params(self, status=None, page_size=None, filters=None, brief=False, fields=None):
+        """
+        Build the query parameters of a sites listing
+
+        Args:
+            status (str | list): Status to filter; with several statuses
+                the parameter is repeated and NetBox ORs them
+            page_size (int): Sites per page (default: server page size)
+            filters (dict): Extra query parameters (e.g. last_updated__gte)
+            brief (bool): Ask for the brief representation of the sites
+            fields (list): Only return these fields of each site
+
+        Returns:
+            dict: Query parameters
+        """
+        params = dict(filters or {})
+        if status:
+            params["status"] = status if isinstance(status, str) else list(status)
+        if page_size:
+            params["limit"] = page_size
+        if brief:
+            params["brief"] = "true"
+        if fields:
+            params["fields"] = ",".join(fields)
+        return params
+
+    def _prefetch_pages(self, executor, params, first_page):
+        """
+        Request the pages after the first one, keeping max_workers in flight
+
+        The requests start as soon as this method is called. The page size is
+        taken from the number of results in the first page, so it matches
+        whatever limit the server actually applied.
+
+        Args:
+            executor (ThreadPoolExecutor): Executor running the requests
+            params (dict): Query parameters used for the first page
+            first_page (dict): Decoded first page
+
+        Returns:
+            generator: Decoded remaining pages, in server order
+        """
+        count = first_page.get("count") or 0
+        page_size = len(first_page.get("results", []))
+        offsets = iter(range(page_size, count, page_size) if page_size else [])
+        pending = deque()
+
+        def schedule_next():
+            offset = next(offsets, None)
+            if offset is not None:
+                page_params = {**params, "limit": page_size, "offset": offset}
+                pending.append(executor.submit(self._get_page, page_params))
+
+        for _ in range(self.max_workers):
+            schedule_next()
+
+        def pages():
+            while pending:
+                page = pending.popleft().result()
+                schedule_next()
+                yield page
+
+        return pages()
+
+    def iter_sites(
+        self, status=None, page_size=None, filters=None, brief=False, fields=None, backend="rest"
+    ):
+        """
+        Iterate over the sites matching a status as each page arrives
+
+        While the caller consumes one page, the following ones (up to
+        max_workers) are already being downloaded. With brief or fields the
+        server only serializes (and the client only decodes) part of each
+        site, and the yielded dicts only hold those keys.
+
+        Args:
+            status (str | list): Status or statuses to filter (active, planned, etc.)
+            page_size (int): Sites per page (default: server page size)
+            filters (dict): Extra query parameters (e.g. region, tenant)
+            brief (bool): Ask for the brief representation of the sites
+            fields (list): Only return these fields of each site (e.g.
+                DISPLAY_FIELDS)
+            backend (str): "rest" or "graphql"; with GraphQL, filters use
+                the GraphQL filter syntax, brief is ignored and fields may
+                include region, tenant, group and device_count, which are
+                fetched in the same request (device_count downloads every
+                device id of each site)
+
+        Yields:
+            dict: Each site that matches the status, in server order
+
+        Raises:
+            requests.exceptions.RequestException: If a page can't be fetched
+        """
+        if backend == "graphql":
+            yield from self.graphql.iter_sites(status, page_size, filters, fields)
+            return
+        if backend != "rest":
+            raise ValueError(f"Unknown backend '{backend}', use one of: {', '.join(BACKENDS)}")
+
+        params = self._build_params(status, page_size, filters, brief, fields)
+        first_page = self._get_page(params)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            pages = self._prefetch_pages(executor, params, first_page)
+            yield from first_page.get("results", [])
+            for page in pages:
+                yield from page.get("results", [])
+        finally:
+            # Drop the pages requested ahead if the caller stops early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def count_sites(self, status=None, filters=None):
+        """
+        Count the sites matching a status without downloading them
+
+        Args:
+            status (str | list): Status or statuses to filter
+            filters (dict): Extra query parameters
+
+        Returns:
+            int: Number of matching sites
+
+        Raises:
+            requests.exceptions.RequestException: If the count can't be read
+        """
+        # Only the id of the single site returned is needed
+        params = self._build_params(status, 1, filters, fields=["id"])
+        return self._get_page(params).get("count", 0)
+
+    def count_sites_by_status(self, statuses=None, filters=None):
+        """
+        Count the sites of each status without downloading them
+
+        One limit=1 request per status is sent, all of them in parallel.
+
+        Args:
+            statuses (list): Statuses to count (default: every available status)
+            filters (dict): Extra query parameters
+
+        Returns:
+            dict: Status -> number of sites, in the order of the statuses
+
+        Raises:
+            requests.exceptions.RequestException: If a count can't be read
+        """
+        if statuses is None:
+            statuses = self.get_available_statuses()
+
+        workers = max(1, min(self.max_workers, len(statuses)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            counts = executor.map(lambda status: self.count_sites(status, filters), statuses)
+            return dict(zip(statuses, counts))
+
+    def get_sites_by_status(
+        self, status=None, page_size=None, brief=False, fields=None, backend="rest"
+    ):
+        """
+        Query sites by specific status, following every page of results
+
+        The first page tells how many sites match; the remaining pages are
+        then requested in parallel and merged in order.
+
+        Args:
+            status (str | list): Status or statuses to filter (active, planned, etc.)
+            page_size (int): Sites per page (default: server page size)
+            brief (bool): Ask for the brief representation of the sites
+            fields (list): Only return these fields of each site
+            backend (str): "rest" or "graphql" (see iter_sites())
+
+        Returns:
+            list: List of sites that match the status
+        """
+        try:
+            if backend != "rest":
+                return list(self.iter_sites(status, page_size, fields=fields, backend=backend))
+
+            # Query parameters
+            params = self._build_params(status, page_size, brief=brief, fields=fields)
+
+            # Make GET request for the first page
+            data = self._get_page(params)
+
+            sites = list(data.get("results", []))
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for page in self._prefetch_pages(executor, params, data):
+                    sites.extend(page.get("results", []))
+            return sites
 
         except requests.exceptions.RequestException as e:
             print(f"Error connecting to NetBox API: {e}")
@@ -62,62 +505,198 @@ class NetBoxAPIClient:
             print(f"Error parsing JSON response: {e}")
             return None
 
-    def get_available_statuses(self):
+    def get_field_choices(self, field, refresh=False):
         """
-        Get available statuses for sites
+        Get the choices of a field of the sites endpoint
+
+        The choices come from the OPTIONS schema. Every choice field of the
+        schema is extracted at once and, with a choices cache, stored on disk
+        so later calls (for this or other fields) need no request. Until the
+        client has seen a response, it doesn't know the API version and
+        serves cached choices of any version; the first response from an
+        upgraded server drops them (see _remember_api_version()).
+
+        Args:
+            field (str): Field name (status, time_zone, etc.)
+            refresh (bool): Ignore the cached choices and read the schema again
 
         Returns:
-            list: List of available statuses
+            list: Choices of the field, as dicts with value and display
+
+        Raises:
+            requests.exceptions.RequestException: If the schema can't be read
         """
-        try:
-            response = requests.options(self.url, headers=self.headers)
+        if self.choices_cache is not None and not refresh:
+            fields = self.choices_cache.get(self.url, self.api_version)
+            if fields is not None and field in fields:
+                return fields[field]
+
+        with self._instrument("options", self.url) as event:
+            response = self._request("options", self.url, event)
             response.raise_for_status()
+            self._remember_api_version(response)
+            schema = self._decode(response, event)
+
+        fields = {
+            name: [
+                {"value": choice["value"], "display": choice.get("display")}
+                for choice in meta["choices"]
+            ]
+            for name, meta in schema.get("actions", {}).get("POST", {}).items()
+            if isinstance(meta, dict) and "choices" in meta
+        }
+        if self.choices_cache is not None:
+            self.choices_cache.set(self.url, self.api_version, fields)
+
+        return fields.get(field, [])
 
-            schema = response.json()
-            status_choices = (
-                schema.get("actions", {})
-                .get("POST", {})
-                .get("status", {})
-                .get("choices", [])
-            )
+    def get_available_statuses(self, refresh=False):
+        """
+        Get available statuses for sites
 
-            return [choice["value"] for choice in status_choices]
+        Args:
+            refresh (bool): Ignore the cached choices and read the schema again
+
+        Returns:
+            list: List of available statuses
+        """
+        try:
+            return [choice["value"] for choice in self.get_field_choices("status", refresh)]
 
         except requests.exceptions.RequestException as e:
             print(f"Error getting available statuses: {e}")
-            return ["active", "staging", "planned", "decommissioning", "retired"]  # Default values
+            return list(DEFAULT_STATUSES)  # Default values
 
 
 def display_sites(sites, status=None):
     """
     Display sites in readable format
 
+    Sites are printed as they are consumed, so an iterator such as
+    NetBoxAPIClient.iter_sites() is displayed while it is still being
+    fetched. The total is printed in the title for lists and after the
+    last site for iterators.
+
     Args:
-        sites (list): List of sites
-        status (str): Queried status (for the title)
+        sites (list | iterable): List or iterator of sites
+        status (str | list): Queried status or statuses (for the title)
     """
-    if not sites:
-        if status:
-            print(f"No sites found with status '{status}'")
-        else:
-            print("No sites found")
+    write_stdout(lambda stream: write_sites(sites or [], "text", stream, status))
+
+
+def location_filters(args):
+    """
+    Build the region/tenant filters given on the command line
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        dict: Filters by slug, without the ones not given
+    """
+    filters = {"region": args.region, "tenant": args.tenant}
+    return {key: value for key, value in filters.items() if value}
+
+
+def notice(args, message):
+    """
+    Print a progress message
+
+    With a machine-readable --format the message goes to stderr, so stdout
+    only holds the sites.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        message (str): Message to print
+    """
+    print(message, file=sys.stdout if args.format == "text" else sys.stderr)
+
+
+def write_stdout(write):
+    """
+    Let a writer of netbox_output write to stdout
+
+    Args:
+        write (callable): Receives a binary stream and writes to it
+    """
+    # Whatever was printed so far must come before the sites
+    sys.stdout.flush()
+    stream = getattr(sys.stdout, "buffer", None)
+    if stream is not None:
+        try:
+            write(stream)
+            stream.flush()
+        except BrokenPipeError:
+            # The reader went away (e.g. `| head`). Point stdout at devnull so
+            # flushing it at exit doesn't fail again, and stop quietly
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
         return
 
-    title = f"Sites found"
-    if status:
-        title += f" with status '{status}'"
+    # stdout was replaced by a text-only stream (e.g. redirect_stdout)
+    stream = io.BytesIO()
+    write(stream)
+    sys.stdout.write(stream.getvalue().decode("utf-8"))
+
+
+def output_sites(sites, args):
+    """
+    Write sites to stdout in the --format chosen, as they are consumed
+
+    Args:
+        sites (iterable): Sites (an iterator is consumed lazily)
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    write_stdout(lambda stream: write_sites(sites, args.format, stream, args.status, args.fields))
+
+
+@contextmanager
+def profiling(args):
+    """
+    Build the instrumentation hooks asked on the command line
+
+    With --profile, the per-endpoint summary is printed to stderr when the
+    block ends (even after an error); --profile-output writes every request
+    as a JSON line.
+
+    Yields:
+        list: Hooks to pass to NetBoxAPIClient
+    """
+    hooks = []
+    profiler = Profiler() if args.profile else None
+    exporter = NDJSONExporter(args.profile_output) if args.profile_output else None
+    hooks.extend(hook for hook in (profiler, exporter) if hook is not None)
+    try:
+        yield hooks
+    finally:
+        if exporter is not None:
+            exporter.close()
+        if profiler is not None:
+            print("\nRequest profile:", file=sys.stderr)
+            print(profiler.report(), file=sys.stderr)
+
+
+def query_snapshot(args):
+    """
+    Display the sites of the local snapshot that match the command line
 
-    print(f"\n{title} ({len(sites)} sites):")
-    print("=" * 60)
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    with SiteSnapshot(args.snapshot) as snapshot:
+        age = snapshot.age()
+        if age is None:
+            print(f"ERROR: The snapshot {args.snapshot} is empty; fill it with --update-snapshot")
+            sys.exit(1)
 
-    for site in sites:
-        print(f"ID: {site.get('id', 'N/A')}")
-        print(f"Name: {site.get('name', 'N/A')}")
-        print(f"Slug: {site.get('slug', 'N/A')}")
-        print(f"Status: {site.get('status', {}).get('label', 'N/A')}")
-        print(f"Description: {site.get('description', 'N/A')}")
-        print(f"URL: {site.get('url', 'N/A')}")
-        print("-" * 40)
+        notice(
+            args,
+            f"Querying snapshot {args.snapshot} of {snapshot.base_url} "
+            f"({snapshot.count()} sites, updated {format_age(age)} ago)...",
+        )
+        sites = snapshot.query(status=args.status, **location_filters(args))
+        output_sites(sites, args)
 
 
 def main():
@@ -127,8 +706,10 @@ def main():
     )
     parser.add_argument(
         "--status",
-        type=str,
-        help="Status of sites to query (active, planned, etc.)",
+        type=lambda value: [status.strip() for status in value.split(",") if status.strip()],
+        action="extend",
+        help="Status of sites to query (active, planned, etc.); repeat it or separate "
+        "several statuses with commas",
     )
     parser.add_argument(
         "--url",
@@ -137,41 +718,255 @@ def main():
         help="NetBox base URL (default: http://localhost:8000)",
     )
     parser.add_argument(
-        "--token", type=str, required=True, help="NetBox API token"
+        "--token", type=str, help="NetBox API token (not needed with --offline)"
+    )
+    parser.add_argument(
+        "--region", type=str, help="Only sites in this region (slug)"
+    )
+    parser.add_argument(
+        "--tenant", type=str, help="Only sites of this tenant (slug)"
     )
     parser.add_argument(
         "--list-statuses", action="store_true", help="Show available statuses"
     )
+    parser.add_argument(
+        "--counts",
+        action="store_true",
+        help="Show the number of sites of each status (all statuses unless --status)",
+    )
+    parser.add_argument(
+        "--refresh-choices",
+        action="store_true",
+        help="Read the statuses from the server instead of the local cache",
+    )
+    parser.add_argument(
+        "--sync",
+        type=str,
+        metavar="STATE_FILE",
+        help="Update a local snapshot of all sites, downloading only the changes",
+    )
+    parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="With --sync, download the whole inventory again",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Output format of the sites (default: text)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="rest",
+        help="API used to query the sites (default: rest)",
+    )
+    parser.add_argument(
+        "--brief",
+        action="store_true",
+        help="Ask NetBox for the brief representation of the sites",
+    )
+    parser.add_argument(
+        "--fields",
+        type=lambda value: [field.strip() for field in value.split(",") if field.strip()],
+        help=f"Comma-separated site fields to download (default: {','.join(DISPLAY_FIELDS)})",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        default=DEFAULT_SNAPSHOT,
+        help=f"SQLite file with the local snapshot of sites (default: {DEFAULT_SNAPSHOT})",
+    )
+    parser.add_argument(
+        "--update-snapshot",
+        action="store_true",
+        help="Store all sites in the local snapshot (from the --sync state if given)",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Answer the query from the local snapshot, without connecting to NetBox",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        help="Sites per page (default: server page size)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Pages fetched in parallel (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Cache responses in this directory (disabled by default)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help=f"Seconds a cached response is used before revalidating it (default: {DEFAULT_CACHE_TTL})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"Maximum number of cached responses (default: {DEFAULT_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries of 429/5xx responses and connection errors (default: {DEFAULT_MAX_RETRIES})",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Maximum requests per second sent to NetBox (unlimited by default)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-endpoint timing summary of the API requests to stderr",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        metavar="FILE",
+        help="Append the timings of every API request to FILE as NDJSON",
+    )
 
     args = parser.parse_args()
 
     # Validate that a status is specified
-    if not args.status and not args.list_statuses:
+    if not (
+        args.status
+        or args.list_statuses
+        or args.counts
+        or args.sync
+        or args.update_snapshot
+        or args.offline
+    ):
         print("ERROR: You must specify a status with --status or use --list-statuses")
         print("Example: python netbox_sites.py --token your_token --status active")
         sys.exit(1)
 
-    # Create API client
-    client = NetBoxAPIClient(args.url, args.token)
+    if args.rate_limit is not None and args.rate_limit <= 0:
+        print("ERROR: --rate-limit must be greater than 0")
+        sys.exit(1)
 
-    # Show available statuses if requested
-    if args.list_statuses:
-        print("Available statuses:")
-        statuses = client.get_available_statuses()
-        for status in statuses:
-            print(f"  - {status}")
+    # Offline queries don't need NetBox at all
+    if args.offline:
+        query_snapshot(args)
         return
 
-    # Query sites
-    print(f"Querying sites with status '{args.status}' on {args.url}...")
-    sites = client.get_sites_by_status(args.status)
-
-    if sites is None:
-        print("Error querying the API")
+    if not args.token:
+        print("ERROR: You must specify the NetBox API token with --token")
         sys.exit(1)
 
-    # Display results
-    display_sites(sites, args.status)
+    cache = None
+    choices_cache_path = DEFAULT_CHOICES_CACHE
+    if args.cache_dir:
+        cache = DiskResponseCache(args.cache_dir, ttl=args.cache_ttl, max_entries=args.cache_size)
+        choices_cache_path = os.path.join(args.cache_dir, "choices.json")
+
+    # Create API client (its connections are closed when leaving the block)
+    with profiling(args) as hooks, NetBoxAPIClient(
+        args.url,
+        args.token,
+        max_workers=args.workers,
+        cache=cache,
+        choices_cache=ChoicesCache(choices_cache_path),
+        retry=RetryPolicy(max_retries=args.retries),
+        rate_limiter=RateLimiter(args.rate_limit) if args.rate_limit else None,
+        hooks=hooks,
+    ) as client:
+        # Show available statuses if requested
+        if args.list_statuses:
+            print("Available statuses:")
+            statuses = client.get_available_statuses(refresh=args.refresh_choices)
+            for status in statuses:
+                print(f"  - {status}")
+            return
+
+        # Update the local snapshot and answer the query from it
+        if args.sync:
+            site_sync = SiteSync(client, args.sync)
+            try:
+                notice(args, site_sync.sync(full=args.full_sync))
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                print(f"Error synchronizing sites: {e}")
+                sys.exit(1)
+            if args.update_snapshot:
+                with SiteSnapshot(args.snapshot) as snapshot:
+                    total = snapshot.replace(site_sync.sites(), client.base_url)
+                notice(args, f"Snapshot {args.snapshot} updated ({total} sites)")
+                if args.status or args.region or args.tenant:
+                    query_snapshot(args)
+            elif args.status:
+                sites = (
+                    site for site in site_sync.sites()
+                    if site.get("status", {}).get("value") in args.status
+                )
+                output_sites(sites, args)
+            return
+
+        # Download every site into the local snapshot
+        if args.update_snapshot:
+            notice(args, f"Downloading all sites from {args.url}...")
+            try:
+                with SiteSnapshot(args.snapshot) as snapshot:
+                    total = snapshot.replace(
+                        client.iter_sites(page_size=args.page_size), client.base_url
+                    )
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                print(f"Error querying the API: {e}")
+                sys.exit(1)
+            notice(args, f"Snapshot {args.snapshot} updated ({total} sites)")
+            if args.status or args.region or args.tenant:
+                query_snapshot(args)
+            return
+
+        # Count the sites of each status without downloading them
+        if args.counts:
+            try:
+                counts = client.count_sites_by_status(args.status, location_filters(args))
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                print(f"Error querying the API: {e}")
+                sys.exit(1)
+            print("Sites per status:")
+            for status, count in counts.items():
+                print(f"  {status:<20} {count}")
+            print(f"  {'total':<20} {sum(counts.values())}")
+            return
+
+        # Query sites; they are displayed page by page as they arrive
+        notice(args, f"Querying sites with status '{', '.join(args.status)}' on {args.url}...")
+        filters = location_filters(args)
+        fields = args.fields
+        if args.backend == "graphql":
+            filters = {key: {"slug": {"exact": value}} for key, value in filters.items()}
+        elif not fields and not args.brief:
+            # Only download what the output shows
+            fields = DISPLAY_FIELDS
+        sites = client.iter_sites(
+            args.status,
+            page_size=args.page_size,
+            filters=filters,
+            brief=args.brief,
+            fields=fields,
+            backend=args.backend,
+        )
+
+        try:
+            # Write the results as they arrive
+            output_sites(sites, args)
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            print(f"Error querying the API: {e}")
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -183,11 +978,10 @@ if __name__ == "__main__":
 NETBOX_URL = "http://localhost:8000"
 NETBOX_TOKEN = "your_token_here"
 
-# Create client
-client = NetBoxAPIClient(NETBOX_URL, NETBOX_TOKEN)
-
-# Query active sites
-sites = client.get_sites_by_status("active")
-if sites is not None:
-    display_sites(sites, "active")
+# Create client (the session is closed when leaving the block)
+with NetBoxAPIClient(NETBOX_URL, NETBOX_TOKEN) as client:
+    # Query active sites
+    sites = client.get_sites_by_status("active")
+    if sites is not None:
+        display_sites(sites, "active")
 """
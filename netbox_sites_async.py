@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Asyncio variant of the NetBox API client.
+
+AsyncNetBoxAPIClient offers the same queries as NetBoxAPIClient but runs on
+an event loop, so many status/tenant/region queries can be in flight at the
+same time against one NetBox while a semaphore keeps the load bounded.
+Requirements: aiohttp
+"""
+
+import asyncio
+import json
+from collections import deque
+from urllib.parse import urljoin
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from netbox_retry import CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+from netbox_sites import DEFAULT_MAX_WORKERS, DEFAULT_STATUSES
+
+
+# Maximum number of requests in flight at the same time by default
+DEFAULT_MAX_CONCURRENCY = DEFAULT_MAX_WORKERS
+
+
+class AsyncNetBoxAPIClient:
+    def __init__(
+        self,
+        base_url,
+        api_token,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        keep_alive=True,
+        retry=None,
+        rate_limiter=None,
+        circuit_breaker=None,
+    ):
+        """
+        Initialize the asyncio NetBox API client
+
+        The HTTP session is opened lazily on the first request. Use the client
+        as an async context manager (or await close()) to release it.
+
+        Args:
+            base_url (str): NetBox base URL (e.g., http://localhost:8000)
+            api_token (str): NetBox API token
+            max_concurrency (int): Maximum number of requests in flight
+            keep_alive (bool): Keep connections open between requests
+            retry (RetryPolicy): Retries of 429/5xx responses and connection
+                errors (default: RetryPolicy())
+            rate_limiter (RateLimiter): Optional token bucket limiting the
+                requests per second; can be shared with threaded clients
+            circuit_breaker (CircuitBreaker): Pauses requests when NetBox
+                keeps failing (default: CircuitBreaker())
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncNetBoxAPIClient requires aiohttp (pip install aiohttp)")
+
+        self.base_url = base_url.rstrip("/")
+        self.api_url = urljoin(self.base_url, "/api/")
+        # Build endpoint URL
+        self.url = urljoin(self.api_url, "dcim/sites/")
+        self.headers = {
+            "Authorization": f"Token {api_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+        self.max_concurrency = max(1, max_concurrency)
+        self.keep_alive = keep_alive
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.session = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _get_session(self):
+        """Return the HTTP session, opening it on first use"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency, force_close=not self.keep_alive
+            )
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+        return self.session
+
+    async def close(self):
+        """Close the HTTP session and its pooled connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _request_json(self, method, params=None):
+        """
+        Send a request to the sites endpoint, waiting for a free slot first
+
+        429/5xx responses and connection errors are retried with backoff;
+        the slot is released while waiting for the next attempt.
+
+        Args:
+            method (str): HTTP method (GET, OPTIONS)
+            params (dict): Query parameters
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            aiohttp.ClientError: If the request fails
+        """
+        # One outcome per call, once the retries are over (see
+        # NetBoxAPIClient._request)
+        self.circuit_breaker.before_request()
+        try:
+            data = await self._send_json(method, params)
+        except aiohttp.ClientResponseError as e:
+            # The server answered: only the retried statuses are failures
+            if e.status in self.retry.statuses:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            raise
+        except BaseException as e:
+            # Includes the cancellation of prefetched pages by iter_sites
+            self.circuit_breaker.record_error(e)
+            raise
+        self.circuit_breaker.record_success()
+        return data
+
+    async def _send_json(self, method, params=None):
+        """Send a request through the rate limiter, retrying it as needed"""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    session = self._get_session()
+                    async with session.request(method, self.url, params=params) as response:
+                        if response.status in self.retry.statuses:
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if response.status not in self.retry.statuses or not self.retry.should_retry(
+                            attempt, retry_after
+                        ):
+                            response.raise_for_status()
+                            return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not self.retry.should_retry(attempt):
+                    raise
+
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    async def _get_page(self, params):
+        """
+        Fetch a single page of the sites endpoint
+
+        Args:
+            params (dict): Query parameters (filters, limit, offset)
+
+        Returns:
+            dict: Decoded page (count, next, previous, results)
+        """
+        return await self._request_json("GET", params)
+
+    async def iter_sites(self, status=None, page_size=None):
+        """
+        Iterate over the sites matching a status, page by page
+
+        Up to max_concurrency pages are requested ahead of the one being
+        consumed, and sites are yielded in server order.
+
+        Args:
+            status (str): Status to filter (active, planned, decommissioning, etc.)
+            page_size (int): Sites per page (default: server page size)
+
+        Yields:
+            dict: Each site that matches the status
+        """
+        params = {}
+        if status:
+            params["status"] = status
+        if page_size:
+            params["limit"] = page_size
+
+        first_page = await self._get_page(params)
+        results = first_page.get("results", [])
+        for site in results:
+            yield site
+
+        count = first_page.get("count") or 0
+        page_size = len(results)
+        if not page_size or count <= page_size:
+            return
+
+        offsets = iter(range(page_size, count, page_size))
+        pending = deque()
+
+        def schedule_next():
+            offset = next(offsets, None)
+            if offset is not None:
+                page_params = {**params, "limit": page_size, "offset": offset}
+                pending.append(asyncio.ensure_future(self._get_page(page_params)))
+
+        for _ in range(self.max_concurrency):
+            schedule_next()
+
+        try:
+            while pending:
+                page = await pending.popleft()
+                schedule_next()
+                for site in page.get("results", []):
+                    yield site
+        finally:
+            # Don't leave requests running if the caller stops early
+            for task in pending:
+                task.cancel()
+
+    async def get_sites_by_status(self, status=None, page_size=None):
+        """
+        Query sites by specific status, following every page of results
+
+        Args:
+            status (str): Status to filter (active, planned, decommissioning, etc.)
+            page_size (int): Sites per page (default: server page size)
+
+        Returns:
+            list: List of sites that match the status
+        """
+        try:
+            return [site async for site in self.iter_sites(status, page_size)]
+
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            print(f"Error connecting to NetBox API: {e}")
+            return None
+        except json.JSONDecodeError as e:
+            print(f"Error parsing JSON response: {e}")
+            return None
+
+    async def get_available_statuses(self):
+        """
+        Get available statuses for sites
+
+        Returns:
+            list: List of available statuses
+        """
+        try:
+            schema = await self._request_json("OPTIONS")
+            status_choices = (
+                schema.get("actions", {})
+                .get("POST", {})
+                .get("status", {})
+                .get("choices", [])
+            )
+
+            return [choice["value"] for choice in status_choices]
+
+        except (aiohttp.ClientError, CircuitOpenError) as e:
+            print(f"Error getting available statuses: {e}")
+            return list(DEFAULT_STATUSES)  # Default values
+
+
+# Usage example: several statuses queried concurrently on one event loop
+"""
+import asyncio
+
+async def main():
+    async with AsyncNetBoxAPIClient("http://localhost:8000", "your_token_here") as client:
+        active, planned = await asyncio.gather(
+            client.get_sites_by_status("active"),
+            client.get_sites_by_status("planned"),
+        )
+
+asyncio.run(main())
+"""
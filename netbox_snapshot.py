@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Local snapshot of the NetBox site inventory in a SQLite file.
+
+SiteSnapshot stores every site as a JSON document plus the columns that are
+usually filtered on (status, slug, region, tenant, name), each one indexed,
+so questions like "which sites are planned in region X" are answered offline
+in milliseconds instead of with a live API round trip.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+
+# Columns that can be used to filter the snapshot, all of them indexed
+FILTER_COLUMNS = ("status", "slug", "region", "tenant", "name")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    slug TEXT,
+    status TEXT,
+    region TEXT,
+    tenant TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sites_status ON sites (status);
+CREATE INDEX IF NOT EXISTS sites_slug ON sites (slug);
+CREATE INDEX IF NOT EXISTS sites_region ON sites (region);
+CREATE INDEX IF NOT EXISTS sites_tenant ON sites (tenant);
+CREATE INDEX IF NOT EXISTS sites_name ON sites (name);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _slug(value):
+    """Get the slug of a nested object (region, tenant) or choice (status)"""
+    if isinstance(value, dict):
+        return value.get("slug") or value.get("value")
+    return value
+
+
+def _row(site):
+    """Build the table row of a site"""
+    return (
+        site["id"],
+        site.get("name"),
+        site.get("slug"),
+        _slug(site.get("status")),
+        _slug(site.get("region")),
+        _slug(site.get("tenant")),
+        json.dumps(site),
+    )
+
+
+class SiteSnapshot:
+    def __init__(self, path):
+        """
+        Open (or create) a snapshot file
+
+        Args:
+            path (str): SQLite file holding the snapshot
+        """
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Close the SQLite connection"""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def replace(self, sites, base_url=None):
+        """
+        Replace the whole snapshot with a new inventory
+
+        The previous snapshot stays readable until the new one is committed.
+
+        Args:
+            sites (iterable): Sites to store (a generator is consumed lazily)
+            base_url (str): NetBox the sites were read from
+
+        Returns:
+            int: Number of sites stored
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM sites")
+            self.connection.executemany(
+                "INSERT INTO sites VALUES (?, ?, ?, ?, ?, ?, ?)", (_row(site) for site in sites)
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                [("base_url", base_url), ("updated_at", repr(time.time()))],
+            )
+        return self.count()
+
+    def query(self, **filters):
+        """
+        Find the sites matching some filters
+
+        Args:
+            **filters: Values of the FILTER_COLUMNS to match (region and
+                tenant by slug, status by value); a list matches any of its
+                values and None values are ignored
+
+        Yields:
+            dict: Each matching site, ordered by id
+        """
+        unknown = set(filters) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown snapshot filters: {', '.join(sorted(unknown))}")
+
+        conditions = []
+        values = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(f"{column} IN ({', '.join('?' * len(value))})")
+                values.extend(value)
+            else:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+
+        sql = "SELECT data FROM sites"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+
+        for (data,) in self.connection.execute(sql, values):
+            yield json.loads(data)
+
+    def count(self):
+        """Number of sites in the snapshot"""
+        return self.connection.execute("SELECT COUNT(*) FROM sites").fetchone()[0]
+
+    def _metadata(self, key):
+        row = self.connection.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def base_url(self):
+        """NetBox the snapshot was read from"""
+        return self._metadata("base_url")
+
+    def age(self):
+        """
+        Seconds since the snapshot was last updated
+
+        Returns:
+            float: Age in seconds, or None if it was never filled
+        """
+        updated_at = self._metadata("updated_at")
+        if updated_at is None:
+            return None
+        return time.time() - float(updated_at)
+
+
+def format_age(seconds):
+    """
+    Format a snapshot age for humans
+
+    Args:
+        seconds (float): Age in seconds, or None
+
+    Returns:
+        str: e.g. "3h 12m", "45s" or "never updated"
+    """
+    if seconds is None:
+        return "never updated"
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Incremental (delta) synchronization of NetBox sites.
+
+SiteSync keeps a local snapshot of every site in a JSON state file, together
+with a high-water mark: the most recent last_updated value seen. The first
+run downloads the whole inventory; later runs only ask for the sites changed
+since the mark (last_updated__gte) and merge them into the snapshot.
+Deleted sites are detected by comparing the server count with the snapshot
+size and, only when they differ, reconciled with an id-only listing.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+
+
+class SyncResult:
+    def __init__(self, full, changed, deleted, total, high_water_mark):
+        """
+        Summary of a synchronization run
+
+        Args:
+            full (bool): Whether the whole inventory was downloaded
+            changed (int): Sites created or updated since the previous run
+            deleted (int): Sites removed from the snapshot
+            total (int): Sites in the snapshot after the run
+            high_water_mark (str): Most recent last_updated value seen
+        """
+        self.full = full
+        self.changed = changed
+        self.deleted = deleted
+        self.total = total
+        self.high_water_mark = high_water_mark
+
+    def __str__(self):
+        mode = "Full" if self.full else "Incremental"
+        return (
+            f"{mode} sync: {self.changed} changed, {self.deleted} deleted, "
+            f"{self.total} sites in snapshot (last update: {self.high_water_mark})"
+        )
+
+
+def _parse_timestamp(value):
+    """Parse a NetBox ISO 8601 timestamp (fractions and 'Z' are optional)"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _latest_update(sites, current=None):
+    """
+    Get the most recent last_updated value of some sites
+
+    Args:
+        sites (iterable): Sites to inspect
+        current (str): Current high-water mark, if any
+
+    Returns:
+        str: The most recent last_updated value, as sent by the server
+    """
+    latest = current
+    for site in sites:
+        last_updated = site.get("last_updated")
+        if last_updated and (latest is None or _parse_timestamp(last_updated) > _parse_timestamp(latest)):
+            latest = last_updated
+    return latest
+
+
+class SiteSync:
+    def __init__(self, client, state_path):
+        """
+        Initialize the synchronizer
+
+        Args:
+            client (NetBoxAPIClient): Client connected to NetBox
+            state_path (str): JSON file holding the snapshot and the mark
+        """
+        self.client = client
+        self.state_path = os.path.expanduser(state_path)
+
+    def load_state(self):
+        """
+        Read the state file
+
+        A state file written for another NetBox is ignored.
+
+        Returns:
+            dict: base_url, high_water_mark and sites (keyed by id as str)
+        """
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+
+        if not state or state.get("base_url") != self.client.base_url:
+            state = {"base_url": self.client.base_url, "high_water_mark": None, "sites": {}}
+        return state
+
+    def save_state(self, state):
+        """
+        Write the state file atomically
+
+        Args:
+            state (dict): State returned by load_state() and updated by sync()
+        """
+        directory = os.path.dirname(self.state_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def sites(self):
+        """
+        Get the sites of the local snapshot
+
+        Returns:
+            list: Sites, ordered by id
+        """
+        sites = self.load_state()["sites"]
+        return [sites[key] for key in sorted(sites, key=int)]
+
+    def sync(self, full=False):
+        """
+        Bring the local snapshot up to date with NetBox
+
+        Args:
+            full (bool): Download the whole inventory even if a mark exists
+
+        Returns:
+            SyncResult: Summary of the run
+
+        Raises:
+            requests.exceptions.RequestException: If NetBox can't be queried
+        """
+        state = self.load_state()
+        mark = state["high_water_mark"]
+
+        if full or mark is None:
+            sites = {str(site["id"]): site for site in self.client.iter_sites()}
+            state["sites"] = sites
+            state["high_water_mark"] = _latest_update(sites.values())
+            self.save_state(state)
+            return SyncResult(True, len(sites), 0, len(sites), state["high_water_mark"])
+
+        sites = state["sites"]
+        # Sites updated exactly at the mark come back again: only count the
+        # ones that actually differ from the snapshot
+        updates = list(self.client.iter_sites(filters={"last_updated__gte": mark}))
+        changed = 0
+        for site in updates:
+            key = str(site["id"])
+            if sites.get(key) != site:
+                sites[key] = site
+                changed += 1
+
+        # Every site created since the last run is in "updates", so the
+        # snapshot can only have extra sites, and only if some were deleted
+        deleted = 0
+        if self.client.count_sites() != len(sites):
+            server_ids = {
+                str(site["id"]) for site in self.client.iter_sites(fields=["id"])
+            }
+            for key in set(sites) - server_ids:
+                del sites[key]
+                deleted += 1
+
+        state["high_water_mark"] = _latest_update(updates, mark)
+        self.save_state(state)
+        return SyncResult(False, changed, deleted, len(sites), state["high_water_mark"])
@@ -3,9 +3,11 @@
 """
 Test runner for the NetBox API client project.
 
-This script discovers and runs all tests in the project directory.
+This script discovers and runs all tests in the project directory, or the
+load benchmark against a local fake NetBox (see netbox_benchmark.py).
 To run:
     python run_tests.py
+    python run_tests.py --benchmark [--sites 50000 --latency 0.005 ...]
 """
 
 import unittest
@@ -32,5 +34,14 @@ def run_tests():
     return 0 if result.wasSuccessful() else 1
 
 
+def run_benchmark(argv):
+    """Run the client benchmark with its own command line arguments."""
+    import netbox_benchmark
+
+    return netbox_benchmark.main(argv)
+
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["--benchmark"]:
+        sys.exit(run_benchmark(sys.argv[2:]))
     sys.exit(run_tests())
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Unit tests for netbox_cache.py module.
+
+These tests cover the in-memory and on-disk response caches, and how
+NetBoxAPIClient uses them, with mocked HTTP responses.
+
+To run tests:
+    python -m unittest test_netbox_cache.py
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, Mock
+
+# Import the module to test
+from netbox_cache import CacheEntry, ChoicesCache, ResponseCache, DiskResponseCache
+from netbox_sites import NetBoxAPIClient
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the ResponseCache class."""
+
+    def test_make_key(self):
+        """Test that keys don't depend on the order of the params."""
+        key = ResponseCache.make_key("url", {"status": "active", "limit": 50})
+        self.assertEqual(key, ResponseCache.make_key("url", {"limit": 50, "status": "active"}))
+        self.assertNotEqual(key, ResponseCache.make_key("url", {"status": "planned", "limit": 50}))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", CacheEntry(b"1"))
+        cache.set("b", CacheEntry(b"2"))
+        cache.get("a")
+        cache.set("c", CacheEntry(b"3"))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").body, b"1")
+
+    def test_entry_freshness_and_validators(self):
+        """Test the TTL check and the conditional request headers."""
+        entry = CacheEntry(b"{}", stored_at=time.time() - 30, etag='"abc"', last_modified="yesterday")
+        self.assertTrue(entry.is_fresh(60))
+        self.assertFalse(entry.is_fresh(10))
+        self.assertEqual(
+            entry.validators(),
+            {"If-None-Match": '"abc"', "If-Modified-Since": "yesterday"},
+        )
+        self.assertEqual(CacheEntry(b"{}").validators(), {})
+
+
+class TestDiskResponseCache(unittest.TestCase):
+    """Test cases for the DiskResponseCache class."""
+
+    def setUp(self):
+        """Set up a temporary cache directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskResponseCache(self.tmp_dir.name, ttl=60, max_entries=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test that an entry is read back with its body and validators."""
+        self.cache.set("key", CacheEntry(b'{"count": 1}', etag='"v1"'))
+
+        # A new instance sees the entries of a previous run
+        entry = DiskResponseCache(self.tmp_dir.name).get("key")
+        self.assertEqual(entry.json(), {"count": 1})
+        self.assertEqual(entry.etag, '"v1"')
+        self.assertIsNone(entry.last_modified)
+        self.assertIsNone(self.cache.get("missing"))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used file is removed."""
+        self.cache.set("a", CacheEntry(b"1"))
+        self.cache.set("b", CacheEntry(b"2"))
+        # Make "a" older than "b"
+        os.utime(os.path.join(self.tmp_dir.name, "a.cache"), (1, 1))
+        self.cache.set("c", CacheEntry(b"3"))
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("b"))
+
+
+class TestClientCache(unittest.TestCase):
+    """Test cases for the response cache in NetBoxAPIClient."""
+
+    def setUp(self):
+        """Set up a client with an in-memory cache."""
+        self.cache = ResponseCache(ttl=60)
+        self.client = NetBoxAPIClient("http://test-netbox.local", "test-token-12345", cache=self.cache)
+        self.data = {"count": 1, "results": [{"id": 1, "name": "Test Site 1"}]}
+        self.mock_response = Mock(status_code=200, headers={}, content=json.dumps(self.data).encode("utf-8"))
+        self.mock_response.json.return_value = self.data
+
+    @patch('requests.Session.get')
+    def test_fresh_entry_skips_request(self, mock_get):
+        """Test that a fresh cached response is served without a request."""
+        mock_get.return_value = self.mock_response
+
+        self.assertEqual(self.client.get_sites_by_status("active"), self.data["results"])
+        self.assertEqual(self.client.get_sites_by_status("active"), self.data["results"])
+
+        mock_get.assert_called_once()
+        # Other filters are cached separately
+        self.client.get_sites_by_status("planned")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_expired_entry_is_revalidated(self, mock_get):
+        """Test that an expired entry is revalidated and reused on 304."""
+        self.mock_response.headers = {"ETag": '"v1"'}
+        mock_get.return_value = self.mock_response
+        self.client.get_sites_by_status("active")
+
+        self.cache.ttl = 0
+        mock_get.return_value = Mock(status_code=304, headers={}, content=b"")
+        sites = self.client.get_sites_by_status("active")
+
+        self.assertEqual(sites, self.data["results"])
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+
+    @patch('requests.Session.get')
+    def test_expired_entry_is_replaced(self, mock_get):
+        """Test that an expired entry is replaced when the data changed."""
+        mock_get.return_value = self.mock_response
+        self.client.get_sites_by_status("active")
+
+        self.cache.ttl = 0
+        new_data = {"count": 1, "results": [{"id": 2, "name": "Test Site 2"}]}
+        mock_get.return_value = Mock(status_code=200, headers={}, content=json.dumps(new_data).encode("utf-8"))
+        mock_get.return_value.json.return_value = new_data
+
+        self.assertEqual(self.client.get_sites_by_status("active"), new_data["results"])
+        # Without validators the request is not conditional
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {})
+
+        self.cache.ttl = 60
+        self.assertEqual(self.client.get_sites_by_status("active"), new_data["results"])
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class TestChoicesCache(unittest.TestCase):
+    """Test cases for the ChoicesCache class and its use by the client."""
+
+    def setUp(self):
+        """Set up a client with a choices cache in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "choices.json")
+        self.client = NetBoxAPIClient(
+            "http://test-netbox.local", "test-token-12345", choices_cache=ChoicesCache(self.path)
+        )
+        self.schema = {
+            "actions": {
+                "POST": {
+                    "name": {"type": "string"},
+                    "status": {"choices": [
+                        {"value": "active", "display": "Active"},
+                        {"value": "planned", "display": "Planned"},
+                    ]},
+                    "time_zone": {"choices": [{"value": "UTC", "display": "UTC"}]},
+                }
+            }
+        }
+        self.mock_response = Mock(status_code=200, headers={"API-Version": "4.3"})
+        self.mock_response.json.return_value = self.schema
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_version_mismatch(self):
+        """Test that entries of another API version are ignored."""
+        cache = ChoicesCache(self.path)
+        cache.set("url", "4.3", {"status": []})
+
+        self.assertEqual(cache.get("url"), {"status": []})
+        self.assertEqual(cache.get("url", "4.3"), {"status": []})
+        self.assertIsNone(cache.get("url", "4.4"))
+        self.assertIsNone(cache.get("other-url"))
+
+    @patch('requests.Session.options')
+    def test_statuses_read_once(self, mock_options):
+        """Test that the schema is requested once for every choice field."""
+        mock_options.return_value = self.mock_response
+
+        self.assertEqual(self.client.get_available_statuses(), ["active", "planned"])
+
+        # A new client (i.e. a new CLI run) reads the choices from disk
+        client = NetBoxAPIClient(
+            "http://test-netbox.local", "test-token-12345", choices_cache=ChoicesCache(self.path)
+        )
+        self.assertEqual(client.get_available_statuses(), ["active", "planned"])
+        self.assertEqual(client.get_field_choices("time_zone"), [{"value": "UTC", "display": "UTC"}])
+        mock_options.assert_called_once()
+
+        # An explicit refresh reads the schema again
+        client.get_available_statuses(refresh=True)
+        self.assertEqual(mock_options.call_count, 2)
+
+    @patch('requests.Session.options')
+    def test_upgrade_invalidates_choices(self, mock_options):
+        """Test that a new API version seen by the client invalidates the choices."""
+        mock_options.return_value = self.mock_response
+        self.client.get_available_statuses()
+
+        self.client.api_version = "4.4"
+        self.client.get_available_statuses()
+        self.assertEqual(mock_options.call_count, 2)
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.options')
+    def test_upgrade_seen_by_new_client(self, mock_options, mock_get):
+        """Test that a new client drops choices of an older version once a response tells it."""
+        mock_options.return_value = self.mock_response
+        self.client.get_available_statuses()
+
+        # A later run: the choices come from disk before any response
+        client = NetBoxAPIClient(
+            "http://test-netbox.local", "test-token-12345", choices_cache=ChoicesCache(self.path)
+        )
+        self.assertEqual(client.get_available_statuses(), ["active", "planned"])
+        mock_options.assert_called_once()
+
+        mock_get.return_value = Mock(status_code=200, headers={"API-Version": "4.4"})
+        mock_get.return_value.json.return_value = {"count": 0, "results": []}
+        client.count_sites("active")
+
+        self.assertIsNone(ChoicesCache(self.path).get(client.url))
+        client.get_available_statuses()
+        self.assertEqual(mock_options.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
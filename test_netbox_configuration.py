@@ -0,0 +1,249 @@
+"""
+Unit tests for the configuration loader of the NetBox Docker image
+(netbox-docker/docker/configuration.docker.py).
+
+These tests write configuration files to a temporary directory (or use the
+configuration files of the image, with Django stubbed), compile the
+configuration snapshot like the container entrypoint does and load the
+module again like manage.py or a Unit worker would.
+
+To run tests:
+    python -m unittest test_netbox_configuration.py
+"""
+
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+NETBOX_DOCKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "netbox-docker")
+LOADER_PATH = os.path.join(NETBOX_DOCKER_DIR, "docker", "configuration.docker.py")
+CONFIGURATION_DIR = os.path.join(NETBOX_DOCKER_DIR, "configuration")
+
+CONFIGURATION = """
+import os
+from os import environ
+
+ALLOWED_HOSTS = ["*"]
+DATABASE = {"NAME": environ.get("DB_NAME", "netbox"), "HOST": os.getenv("DB_HOST", "localhost")}
+REDIS = {"tasks": {}, "caching": {}}
+SECRET_KEY = environ.get("SECRET_KEY", "")
+"""
+
+
+class LoaderTestCase(unittest.TestCase):
+    """Base of the test cases that load the configuration module."""
+
+    def setUp(self):
+        """Set up a temporary directory for the snapshot."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmp_dir.name, "netbox-configuration.pickle")
+        self.modules = set(sys.modules)
+
+    def tearDown(self):
+        # Configuration files are registered as netbox.configuration.* modules
+        for name in set(sys.modules) - self.modules:
+            del sys.modules[name]
+        self.tmp_dir.cleanup()
+
+    def patch_environ(self, environ):
+        """Set the environment of the container for the test."""
+        environ_patch = patch.dict(os.environ, {"CONFIG_SNAPSHOT": self.snapshot, **environ})
+        environ_patch.start()
+        self.addCleanup(environ_patch.stop)
+        os.environ.pop("DJANGO_SETTINGS_MODULE", None)
+
+    def load(self):
+        """Import the configuration module, as a new process would."""
+        spec = importlib.util.spec_from_file_location("netbox_configuration", LOADER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        with redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+        return module
+
+    def compile(self):
+        """Write the snapshot, like the container entrypoint does."""
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.load().compile_snapshot())
+
+
+class TestConfigurationSnapshot(LoaderTestCase):
+    """Test cases for the configuration snapshot."""
+
+    def setUp(self):
+        """Set up a configuration directory and the environment of the container."""
+        super().setUp()
+        self.config_dir = os.path.join(self.tmp_dir.name, "config")
+        os.mkdir(self.config_dir)
+        with open(os.path.join(self.config_dir, "configuration.py"), "w", encoding="utf-8") as f:
+            f.write(CONFIGURATION)
+        self.patch_environ({"CONFIG_DIR": self.config_dir, "DB_NAME": "netbox", "SECRET_KEY": "secret"})
+
+    def test_snapshot_used_by_manage_py(self):
+        """Test that a process with its own variables, like manage.py, loads the snapshot."""
+        self.compile()
+
+        # manage.py and netbox/wsgi.py set DJANGO_SETTINGS_MODULE before
+        # importing the configuration; Unit and the shell add others
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": "netbox.settings", "PWD": "/opt/netbox/netbox"}):
+            configuration = self.load()
+
+        self.assertEqual(configuration._loaded_configurations, [])
+        self.assertEqual(configuration.DATABASE, {"NAME": "netbox", "HOST": "localhost"})
+        self.assertEqual(configuration.SECRET_KEY, "secret")
+
+    def test_stale_snapshot(self):
+        """Test that changing a variable read by the configuration reads the files again."""
+        self.compile()
+
+        for name, value in (("DB_NAME", "other"), ("DB_HOST", "postgres")):
+            with self.subTest(name=name), patch.dict(os.environ, {name: value}):
+                configuration = self.load()
+                self.assertEqual(len(configuration._loaded_configurations), 1)
+                self.assertEqual(configuration.DATABASE[name[3:]], value)
+
+    def test_snapshot_writable_by_others(self):
+        """Test that a snapshot other users could have written is not unpickled."""
+        self.compile()
+        os.chmod(self.snapshot, 0o666)
+
+        with patch("pickle.load") as mock_load:
+            configuration = self.load()
+
+        mock_load.assert_not_called()
+        self.assertEqual(len(configuration._loaded_configurations), 1)
+
+
+class TestConfigurationResolver(LoaderTestCase):
+    """Test cases for the lookup of options across the configuration files."""
+
+    def setUp(self):
+        """Set up a configuration directory with a second file and load it."""
+        super().setUp()
+        self.config_dir = os.path.join(self.tmp_dir.name, "config")
+        os.mkdir(self.config_dir)
+        self.write("configuration.py", CONFIGURATION + 'TIME_ZONE = "UTC"\nBANNER_TOP = ""\n')
+        self.write("extra.py", 'BANNER_TOP = "extra"\n')
+        self.patch_environ({
+            "CONFIG_DIR": self.config_dir,
+            "CONFIG_SNAPSHOT_ENABLED": "false",
+            "SECRET_KEY": "secret",
+        })
+        self.configuration = self.load()
+
+    def write(self, name, content):
+        with open(os.path.join(self.config_dir, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def module(self, name, **attributes):
+        module = types.ModuleType(name)
+        vars(module).update(attributes)
+        return module
+
+    def test_later_files_override(self):
+        """Test that files read after configuration.py override it, in the same order."""
+        self.assertEqual(self.configuration.BANNER_TOP, "extra")
+        self.assertEqual(self.configuration.TIME_ZONE, "UTC")
+
+        # Like read_configurations, the last file read comes first
+        resolver = self.configuration.ConfigurationResolver([
+            self.module("b", BANNER_TOP="b"),
+            self.module("a", BANNER_TOP="a", TIME_ZONE="Europe/Berlin"),
+            self.module("configuration", BANNER_TOP="", TIME_ZONE="UTC", MAINTENANCE_MODE=False),
+        ])
+        self.assertEqual(resolver.resolve("BANNER_TOP"), "b")
+        self.assertEqual(resolver.resolve("TIME_ZONE"), "Europe/Berlin")
+        self.assertIs(resolver.resolve("MAINTENANCE_MODE"), False)
+
+    def test_missing_option(self):
+        """Test that a miss raises AttributeError and is remembered."""
+        calls = []
+
+        def missing(name):
+            calls.append(name)
+            raise AttributeError(name)
+
+        resolver = self.configuration.ConfigurationResolver([self.module("configuration", __getattr__=missing)])
+
+        for _ in range(2):
+            with self.assertRaises(AttributeError):
+                resolver.resolve("LOGIN_TIMEOUT")
+        self.assertEqual(calls, ["LOGIN_TIMEOUT"])
+        self.assertIn("LOGIN_TIMEOUT", resolver._missing)
+        self.assertEqual(getattr(self.configuration, "LOGIN_TIMEOUT", 3600), 3600)
+
+    def test_dynamic_option_cached(self):
+        """Test that an option provided by a module's __getattr__ is looked up once."""
+        calls = []
+
+        def dynamic(name):
+            calls.append(name)
+            return f"{name.lower()}-value"
+
+        resolver = self.configuration.ConfigurationResolver([self.module("configuration", __getattr__=dynamic)])
+
+        self.assertEqual(resolver.resolve("PLUGINS_CONFIG"), "plugins_config-value")
+        self.assertEqual(resolver.resolve("PLUGINS_CONFIG"), "plugins_config-value")
+        self.assertEqual(calls, ["PLUGINS_CONFIG"])
+        self.assertIn("PLUGINS_CONFIG", resolver.names())
+
+    def test_reload_configurations(self):
+        """Test that reload_configurations() rebuilds the lookup table from the files."""
+        with self.assertRaises(AttributeError):
+            self.configuration.LOGIN_REQUIRED
+        self.write("extra.py", 'BANNER_TOP = "reloaded"\nLOGIN_REQUIRED = True\n')
+
+        with redirect_stdout(io.StringIO()):
+            self.configuration.reload_configurations()
+
+        self.assertEqual(self.configuration.BANNER_TOP, "reloaded")
+        self.assertIs(self.configuration.LOGIN_REQUIRED, True)
+        self.assertIn("LOGIN_REQUIRED", dir(self.configuration))
+
+
+class TestImageConfiguration(LoaderTestCase):
+    """Test cases for the snapshot of the configuration files of the image."""
+
+    def setUp(self):
+        """Stub Django and point the loader to netbox-docker/configuration/."""
+        super().setUp()
+        # configuration.py only needs ImproperlyConfigured from Django
+        exceptions = types.ModuleType("django.core.exceptions")
+        exceptions.ImproperlyConfigured = type("ImproperlyConfigured", (Exception,), {})
+        modules_patch = patch.dict(sys.modules, {
+            "django": types.ModuleType("django"),
+            "django.core": types.ModuleType("django.core"),
+            "django.core.exceptions": exceptions,
+        })
+        modules_patch.start()
+        self.addCleanup(modules_patch.stop)
+        self.patch_environ({
+            "CONFIG_DIR": CONFIGURATION_DIR,
+            "DB_REPLICAS": "postgres-replica",
+            "SECRET_KEY": "secret",
+        })
+
+    def test_snapshot(self):
+        """Test that the image configuration is compiled and loaded from the snapshot."""
+        files = self.load()
+        self.compile()
+        snapshot = self.load()
+
+        self.assertEqual(snapshot._loaded_configurations, [])
+        settings = dir(snapshot)
+        self.assertIn("DATABASES", settings)
+        self.assertNotIn("DATABASE", settings)
+        for name in ("_AS_BOOL", "_AS_LIST", "_BASE_DIR", "_DB_POOL", "environ", "deepcopy"):
+            self.assertNotIn(name, settings)
+        for name in settings:
+            with self.subTest(name=name):
+                self.assertEqual(repr(getattr(snapshot, name)), repr(getattr(files, name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
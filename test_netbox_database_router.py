@@ -0,0 +1,140 @@
+"""
+Unit tests for the read replica router of the NetBox Docker image
+(netbox-docker/docker/database_router.docker.py).
+
+The router is loaded by its path, with Django's connections and signals and
+the NetBox configuration stubbed.
+
+To run tests:
+    python -m unittest test_netbox_database_router.py
+"""
+
+import importlib.util
+import os
+import sys
+import types
+import unittest
+from unittest.mock import MagicMock, patch
+
+ROUTER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "netbox-docker", "docker", "database_router.docker.py"
+)
+
+
+def make_connection(lag=0.0, in_atomic_block=False):
+    """Mock a database connection whose lag query returns `lag`."""
+    connection = MagicMock(in_atomic_block=in_atomic_block)
+    cursor = connection.cursor.return_value.__enter__.return_value
+    if isinstance(lag, Exception):
+        cursor.execute.side_effect = lag
+    else:
+        cursor.fetchone.return_value = (lag,)
+    return connection
+
+
+class TestReplicaRouter(unittest.TestCase):
+    """Test cases for ReplicaRouter."""
+
+    def setUp(self):
+        """Stub Django and the NetBox configuration."""
+        self.connections = {"default": make_connection(), "replica": make_connection(lag=1.0)}
+        self.configuration = types.ModuleType("netbox.configuration")
+        self.configuration.DATABASE_REPLICA_MAX_LAG = 5
+        self.configuration.DATABASE_REPLICA_CHECK_INTERVAL = 10
+        self.signals = types.ModuleType("django.core.signals")
+        self.signals.request_started = MagicMock()
+        self.signals.request_finished = MagicMock()
+        db = types.ModuleType("django.db")
+        db.DEFAULT_DB_ALIAS = "default"
+        db.connections = self.connections
+        netbox = types.ModuleType("netbox")
+        netbox.configuration = self.configuration
+
+        modules_patch = patch.dict(sys.modules, {
+            "django": types.ModuleType("django"),
+            "django.core": types.ModuleType("django.core"),
+            "django.core.signals": self.signals,
+            "django.db": db,
+            "netbox": netbox,
+            "netbox.configuration": self.configuration,
+        })
+        modules_patch.start()
+        self.addCleanup(modules_patch.stop)
+
+    def load(self):
+        """Import the router module and create a router."""
+        spec = importlib.util.spec_from_file_location("netbox_database_router", ROUTER_PATH)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        return self.module.ReplicaRouter()
+
+    def lag_queries(self, alias):
+        return self.connections[alias].cursor.return_value.__enter__.return_value.execute.call_count
+
+    def test_read_from_replica(self):
+        """Test that reads go to the replica and writes to the primary."""
+        router = self.load()
+
+        self.assertEqual(router.replicas, ["replica"])
+        self.assertEqual(router.db_for_read(None), "replica")
+        self.assertEqual(router.db_for_write(None), "default")
+
+    def test_write_pins_request(self):
+        """Test that reads after a write stay on the primary until the next request."""
+        router = self.load()
+
+        router.db_for_write(None)
+        self.assertEqual(router.db_for_read(None), "default")
+
+        # The next request starts unpinned
+        handler = self.signals.request_started.connect.call_args.args[0]
+        handler(sender=None)
+        self.assertEqual(router.db_for_read(None), "replica")
+        self.signals.request_finished.connect.assert_called_once_with(
+            handler, dispatch_uid="netbox_replica_router_finished"
+        )
+
+    def test_read_in_transaction(self):
+        """Test that reads inside a transaction stay on the primary."""
+        router = self.load()
+        self.connections["default"].in_atomic_block = True
+
+        self.assertEqual(router.db_for_read(None), "default")
+        self.assertEqual(self.lag_queries("replica"), 0)
+
+    def test_lagging_replica(self):
+        """Test that a replica lagging more than max_lag is skipped."""
+        self.connections["replica"] = make_connection(lag=6.0)
+        router = self.load()
+
+        self.assertEqual(router.max_lag, 5)
+        self.assertEqual(router.db_for_read(None), "default")
+
+    def test_failing_check(self):
+        """Test that a replica failing the lag check is skipped and its connection closed."""
+        self.connections["replica"] = make_connection(lag=OSError("connection refused"))
+        router = self.load()
+
+        self.assertEqual(router.db_for_read(None), "default")
+        self.connections["replica"].close.assert_called_once_with()
+
+    def test_health_cached(self):
+        """Test that the lag is checked again only after check_interval."""
+        router = self.load()
+
+        with patch.object(self.module.time, "monotonic", side_effect=[100.0, 109.0, 110.0]):
+            for _ in range(3):
+                self.assertEqual(router.db_for_read(None), "replica")
+        self.assertEqual(self.lag_queries("replica"), 2)
+
+    def test_allow_migrate(self):
+        """Test that only the primary is migrated."""
+        router = self.load()
+
+        self.assertTrue(router.allow_migrate("default", "dcim"))
+        self.assertFalse(router.allow_migrate("replica", "dcim"))
+        self.assertTrue(router.allow_relation(object(), object()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Tests of the clients against the local fake NetBox server (netbox_fake.py).
+
+Unlike the other test files, these send real HTTP requests, to a server on
+127.0.0.1, so paging, filters, retries and revalidation are exercised end to
+end without any network access.
+
+To run tests:
+    python -m unittest test_netbox_fake.py
+"""
+
+import argparse
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import requests
+
+# Import the modules to test
+from netbox_benchmark import format_report, measure, run_benchmarks
+from netbox_cache import ResponseCache
+from netbox_fake import FakeNetBoxServer, make_inventory
+from netbox_retry import CircuitBreaker, RetryPolicy
+from netbox_sites import NetBoxAPIClient
+from netbox_sites_async import AsyncNetBoxAPIClient
+
+
+class TestFakeNetBox(unittest.TestCase):
+    """Test cases for the clients against FakeNetBoxServer."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start one server with a small inventory for all the tests."""
+        cls.server = FakeNetBoxServer(size=230, seed=1).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.error_rate = 0.0
+        self.client = NetBoxAPIClient(self.server.url, "test-token-12345", max_workers=4)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_inventory_is_reproducible(self):
+        """Test that the same seed gives the same inventory."""
+        self.assertEqual(make_inventory(20, seed=3), make_inventory(20, seed=3))
+        self.assertNotEqual(make_inventory(20, seed=3), make_inventory(20, seed=4))
+
+    def test_pages_and_filters(self):
+        """Test that every page is read and filters match the inventory."""
+        sites = list(self.client.iter_sites(page_size=50))
+        self.assertEqual([site["id"] for site in sites], list(range(1, 231)))
+
+        planned = [site["id"] for site in self.server.sites if site["status"]["value"] in ("planned", "retired")]
+        sites = self.client.get_sites_by_status(["planned", "retired"], page_size=20, fields=["id", "status"])
+        self.assertEqual([site["id"] for site in sites], planned)
+        self.assertEqual(set(sites[0]), {"id", "status"})
+        self.assertEqual(self.client.count_sites(["planned", "retired"]), len(planned))
+
+    def test_statuses_and_api_version(self):
+        """Test the OPTIONS schema and the API-Version header."""
+        self.assertEqual(
+            self.client.get_available_statuses(),
+            ["active", "planned", "staging", "decommissioning", "retired"],
+        )
+        self.assertEqual(self.client.get_field_choices("status")[0], {"value": "active", "display": "Active"})
+        self.client.count_sites()
+        self.assertEqual(self.client.api_version, "4.3")
+
+    @patch("netbox_sites.time.sleep")
+    def test_injected_errors_are_retried(self, mock_sleep):
+        """Test that the client gets every site despite injected 503s."""
+        self.server.error_rate = 0.2
+        self.client.retry = RetryPolicy(max_retries=10)
+        sites = list(self.client.iter_sites(page_size=10))
+
+        self.assertEqual(len(sites), 230)
+        self.assertTrue(mock_sleep.called)
+
+    @patch("netbox_sites.time.sleep")
+    def test_parallel_transient_errors(self, mock_sleep):
+        """Test that one 503 on each of the pages fetched in parallel doesn't open the circuit."""
+        self.server.requests = 0
+        self.server.retry_after = 1
+        client = NetBoxAPIClient(self.server.url, "test-token-12345", max_workers=8)
+        # Every request after the first page fails once, more than the breaker threshold
+        with client, patch.object(self.server, "should_fail", side_effect=lambda: 2 <= self.server.requests <= 9):
+            sites = list(client.iter_sites(page_size=10))
+
+        self.server.retry_after = 0
+        self.assertEqual(len(sites), 230)
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(mock_sleep.call_count, 8)
+
+    def test_async_parallel_transient_errors(self):
+        """Test the same transient errors with the asyncio client."""
+        async def read():
+            async with AsyncNetBoxAPIClient(self.server.url, "test-token-12345", max_concurrency=8) as client:
+                sites = await client.get_sites_by_status("active", page_size=5)
+                return sites, client.circuit_breaker.state
+
+        self.server.requests = 0
+        with patch.object(self.server, "should_fail", side_effect=lambda: 2 <= self.server.requests <= 9), \
+                patch("netbox_sites_async.asyncio.sleep", AsyncMock()):
+            sites, state = asyncio.run(read())
+
+        expected = [site["id"] for site in self.server.sites if site["status"]["value"] == "active"]
+        self.assertEqual([site["id"] for site in sites], expected)
+        self.assertEqual(state, CircuitBreaker.CLOSED)
+
+    def test_revalidation(self):
+        """Test that expired cache entries are revalidated with the ETag."""
+        self.client.cache = ResponseCache(ttl=0)
+        statuses = []
+        self.client.session.hooks["response"].append(
+            lambda response, *args, **kwargs: statuses.append(response.status_code)
+        )
+
+        first = self.client.count_sites("active")
+        second = self.client.count_sites("active")
+
+        self.assertEqual(first, second)
+        self.assertEqual(statuses, [200, 304])
+
+    def test_token_is_required(self):
+        """Test that requests without a token are rejected."""
+        response = requests.get(f"{self.server.url}/api/dcim/sites/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_async_client(self):
+        """Test that the asyncio client reads the same sites."""
+        async def read():
+            async with AsyncNetBoxAPIClient(self.server.url, "test-token-12345", max_concurrency=4) as client:
+                return await client.get_sites_by_status("active", page_size=25)
+
+        expected = [site["id"] for site in self.server.sites if site["status"]["value"] == "active"]
+        self.assertEqual([site["id"] for site in asyncio.run(read())], expected)
+
+
+class TestBenchmark(unittest.TestCase):
+    """Smoke test of the benchmark harness."""
+
+    def test_run_benchmarks(self):
+        """Test a tiny benchmark run of two modes."""
+        args = argparse.Namespace(
+            sites=300, seed=0, page_size=100, workers=2, latency=0.0, error_rate=0.0,
+            modes=["rest-sequential", "async"], no_memory=False,
+        )
+        results = run_benchmarks(args)
+
+        self.assertEqual(list(results), ["rest-sequential", "async"])
+        for result in results.values():
+            self.assertEqual(result["sites"], 300)
+            self.assertEqual(result["requests"], 3)
+            self.assertGreater(result["peak_mib"], 0)
+
+    def test_failed_mode(self):
+        """Test that a mode failing after its retries is reported, not raised."""
+        def run(url):
+            raise requests.exceptions.HTTPError("503 Server Error")
+
+        results = {
+            "rest-sequential": measure(run, "http://127.0.0.1:1"),
+            "async": measure(lambda url: (10, [0.1], 1.0), "http://127.0.0.1:1", track_memory=False),
+        }
+
+        self.assertEqual(results["rest-sequential"], {"error": "HTTPError: 503 Server Error"})
+        report = format_report(results).splitlines()
+        self.assertEqual(report[1].split(), ["rest-sequential", "failed:", "HTTPError:", "503", "Server", "Error"])
+        self.assertEqual(report[2].split()[:2], ["async", "10"])
+
+
+if __name__ == '__main__':
+    unittest.main()
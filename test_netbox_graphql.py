@@ -0,0 +1,124 @@
+"""
+Unit tests for netbox_graphql.py module.
+
+These tests check the GraphQL queries that are built and use mock responses
+to test paging and error handling without an actual NetBox server.
+
+To run tests:
+    python -m unittest test_netbox_graphql.py
+"""
+
+import unittest
+from unittest.mock import patch, Mock
+
+import requests
+
+# Import the module to test
+from netbox_graphql import GraphQLError, build_site_query, normalize_site
+from netbox_sites import NetBoxAPIClient
+
+
+class TestBuildSiteQuery(unittest.TestCase):
+    """Test cases for the GraphQL query builder."""
+
+    def test_default_fields(self):
+        """Test the query without filters."""
+        self.assertEqual(
+            build_site_query(limit=50),
+            "query { site_list(pagination: {offset: 0, limit: 50}) { id name slug status description } }",
+        )
+
+    def test_related_fields_and_filters(self):
+        """Test that related objects and filters are part of the same query."""
+        query = build_site_query(
+            fields=["id", "name", "region", "tenant", "device_count"],
+            status="planned",
+            filters={"region": {"slug": {"exact": 'eu"rope'}}},
+            offset=100,
+            limit=100,
+        )
+
+        self.assertIn('filters: {region: {slug: {exact: "eu\\"rope"}}, status: STATUS_PLANNED}', query)
+        self.assertIn("pagination: {offset: 100, limit: 100}", query)
+        self.assertIn("region { id name slug } tenant { id name slug } devices { id }", query)
+
+    def test_multiple_statuses(self):
+        """Test that several statuses become OR branches keeping the other filters."""
+        query = build_site_query(status=["active", "planned"], filters={"tenant": {"slug": {"exact": "acme"}}})
+
+        self.assertIn(
+            'filters: {tenant: {slug: {exact: "acme"}}, status: STATUS_ACTIVE, '
+            'OR: {tenant: {slug: {exact: "acme"}}, status: STATUS_PLANNED}}',
+            query,
+        )
+
+    def test_invalid_names(self):
+        """Test that field names can't inject GraphQL."""
+        with self.assertRaises(ValueError):
+            build_site_query(fields=["id } evil {"])
+        with self.assertRaises(ValueError):
+            build_site_query(status="active } evil")
+
+    def test_normalize_site(self):
+        """Test that GraphQL sites get the REST shape."""
+        site = normalize_site({"id": "7", "status": "STATUS_PLANNED", "devices": [{"id": "1"}, {"id": "2"}]})
+        self.assertEqual(site, {
+            "id": 7,
+            "status": {"value": "planned", "label": "Planned"},
+            "device_count": 2,
+        })
+        self.assertEqual(normalize_site({"status": "active"})["status"]["value"], "active")
+
+
+class TestGraphQLBackend(unittest.TestCase):
+    """Test cases for the GraphQL backend of NetBoxAPIClient."""
+
+    def setUp(self):
+        """Set up a client and a few GraphQL sites."""
+        self.client = NetBoxAPIClient("http://test-netbox.local", "test-token-12345")
+        self.sites = [{"id": str(i), "name": f"Site {i}", "status": "active"} for i in range(1, 6)]
+
+    @patch('requests.Session.post')
+    def test_iter_sites_pages(self, mock_post):
+        """Test that pages are requested until a short page arrives."""
+        def fake_post(url, json=None):
+            query = json["query"]
+            offset = int(query.split("offset: ")[1].split(",")[0])
+            mock_response = Mock()
+            mock_response.raise_for_status.return_value = None
+            mock_response.json.return_value = {"data": {"site_list": self.sites[offset:offset + 2]}}
+            return mock_response
+
+        mock_post.side_effect = fake_post
+
+        sites = list(self.client.iter_sites("active", page_size=2, backend="graphql"))
+
+        self.assertEqual([site["id"] for site in sites], [1, 2, 3, 4, 5])
+        self.assertEqual(sites[0]["status"]["label"], "Active")
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(mock_post.call_args.args[0], "http://test-netbox.local/graphql/")
+
+    @patch('requests.Session.post')
+    def test_graphql_errors(self, mock_post):
+        """Test that GraphQL errors are reported like request errors."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {"data": None, "errors": [{"message": "Unknown field"}]}
+        mock_post.return_value = mock_response
+
+        with self.assertRaises(GraphQLError):
+            list(self.client.iter_sites(backend="graphql"))
+
+        with patch("builtins.print") as mock_print:
+            self.assertIsNone(self.client.get_sites_by_status("active", backend="graphql"))
+        mock_print.assert_called_once()
+        self.assertTrue(issubclass(GraphQLError, requests.exceptions.RequestException))
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend is rejected."""
+        with self.assertRaises(ValueError):
+            list(self.client.iter_sites(backend="soap"))
+
+
+if __name__ == '__main__':
+    unittest.main()
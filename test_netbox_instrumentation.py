@@ -0,0 +1,109 @@
+"""
+Unit tests for netbox_instrumentation.py module.
+
+These tests run the client against the local fake NetBox server with hooks
+attached and check the events, the profiler summary and the NDJSON export.
+
+To run tests:
+    python -m unittest test_netbox_instrumentation.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+
+# Import the module to test
+from netbox_cache import ResponseCache
+from netbox_fake import FakeNetBoxServer
+from netbox_instrumentation import NDJSONExporter, Profiler, percentile
+from netbox_sites import NetBoxAPIClient
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test cases for the request hooks of NetBoxAPIClient."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeNetBoxServer(size=120).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.events = []
+        self.client = NetBoxAPIClient(self.server.url, "test-token-12345", hooks=[self.events.append])
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_page_events(self):
+        """Test that every page request gives an event with its timings."""
+        sites = list(self.client.iter_sites(page_size=50))
+
+        self.assertEqual(len(sites), 120)
+        self.assertEqual(len(self.events), 3)
+        event = self.events[0]
+        self.assertEqual((event.method, event.endpoint, event.status), ("GET", "/api/dcim/sites/", 200))
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNone(event.cache)
+        self.assertGreater(event.bytes, 0)
+        self.assertGreater(event.connect, 0)
+        self.assertGreaterEqual(event.total, event.ttfb + event.download + event.decode)
+
+    def test_cache_and_options_events(self):
+        """Test cache hits/misses and the OPTIONS schema request."""
+        self.client.cache = ResponseCache()
+        self.client.count_sites("active")
+        self.client.count_sites("active")
+        self.client.get_available_statuses()
+
+        self.assertEqual([event.cache for event in self.events], ["miss", "hit", None])
+        self.assertEqual(self.events[1].attempts, 0)
+        self.assertEqual(self.events[2].method, "OPTIONS")
+
+    def test_error_event(self):
+        """Test that failed calls are reported too."""
+        self.client.session.headers.pop("Authorization")
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.count_sites()
+
+        self.assertEqual(self.events[0].status, 403)
+        self.assertIn("HTTPError", self.events[0].error)
+
+    def test_profiler_and_exporter(self):
+        """Test the per-endpoint summary and the NDJSON export."""
+        profiler = Profiler()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "requests.ndjson")
+            with NDJSONExporter(path) as exporter:
+                self.client.add_hook(profiler)
+                self.client.add_hook(exporter)
+                self.client.get_sites_by_status("planned", page_size=10)
+                self.client.get_available_statuses()
+
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+
+        pages = profiler.endpoints["GET /api/dcim/sites/"]["requests"]
+        self.assertEqual(len(lines), pages + 1)
+        self.assertEqual(lines[-1]["method"], "OPTIONS")
+        self.assertIn("ttfb_ms", lines[0])
+        report = profiler.report()
+        self.assertIn("GET /api/dcim/sites/", report)
+        self.assertIn("OPTIONS /api/dcim/sites/", report)
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 99), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for netbox_output.py module.
+
+These tests write a few sites in every output format to an in-memory stream
+and read them back.
+
+To run tests:
+    python -m unittest test_netbox_output.py
+"""
+
+import argparse
+import csv
+import io
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import yaml
+
+# Import the module to test
+from netbox_output import FORMATS, write_sites
+from netbox_sites import output_sites
+
+
+class TestWriteSites(unittest.TestCase):
+    """Test cases for the output writers."""
+
+    def setUp(self):
+        """Set up a few sites and an output stream."""
+        self.sites = [
+            {
+                "id": i,
+                "name": f"Site {i}",
+                "slug": f"site-{i}",
+                "status": {"value": "planned", "label": "Planned"},
+                "description": "",
+                "url": f"http://test-netbox.local/api/dcim/sites/{i}/",
+            }
+            for i in range(1, 4)
+        ]
+        self.stream = io.BytesIO()
+
+    def write(self, output_format, sites=None, **kwargs):
+        sites = self.sites if sites is None else sites
+        count = write_sites(iter(sites), output_format, self.stream, **kwargs)
+        return count, self.stream.getvalue().decode("utf-8")
+
+    def test_json(self):
+        """Test that json is a single array of the sites."""
+        count, output = self.write("json")
+        self.assertEqual(count, 3)
+        self.assertEqual(json.loads(output), self.sites)
+
+    def test_ndjson(self):
+        """Test that ndjson has one site per line."""
+        _, output = self.write("ndjson")
+        self.assertEqual([json.loads(line) for line in output.splitlines()], self.sites)
+
+    def test_csv(self):
+        """Test the csv header and the flattened nested values."""
+        _, output = self.write("csv", fields=["id", "name", "status"])
+        rows = list(csv.reader(io.StringIO(output)))
+        self.assertEqual(rows[0], ["id", "name", "status"])
+        self.assertEqual(rows[1], ["1", "Site 1", "planned"])
+        self.assertEqual(len(rows), 4)
+        # The binary stream is still usable after the csv writer is done
+        self.assertFalse(self.stream.closed)
+
+    def test_yaml(self):
+        """Test that yaml is a sequence of the sites."""
+        _, output = self.write("yaml")
+        self.assertEqual(yaml.safe_load(output), self.sites)
+
+    def test_text(self):
+        """Test the readable listing with the total at the end."""
+        _, output = self.write("text", status=["planned", "staging"])
+        self.assertIn("Sites found with status 'planned, staging':", output)
+        self.assertIn("Name: Site 2", output)
+        self.assertIn("Status: Planned", output)
+        self.assertTrue(output.endswith("Total: 3 sites\n"))
+
+    def test_empty(self):
+        """Test that no sites still give valid documents."""
+        for output_format in FORMATS:
+            self.stream = io.BytesIO()
+            count, output = self.write(output_format, sites=[], status="planned")
+            self.assertEqual(count, 0)
+            if output_format == "json":
+                self.assertEqual(json.loads(output), [])
+            elif output_format == "yaml":
+                self.assertEqual(yaml.safe_load(output), [])
+            elif output_format == "text":
+                self.assertEqual(output, "No sites found with status 'planned'\n")
+
+    def test_unknown_format(self):
+        """Test that an unknown format is rejected."""
+        with self.assertRaises(ValueError):
+            self.write("xml")
+
+
+class TestOutputSites(unittest.TestCase):
+    """Test cases for writing sites to stdout."""
+
+    @patch("netbox_sites.os.dup2")
+    @patch("netbox_sites.os.open", return_value=99)
+    def test_broken_pipe(self, mock_open, mock_dup2):
+        """Test that a reader closing the pipe ends the output quietly."""
+        class BrokenPipe(io.BytesIO):
+            def write(self, data):
+                raise BrokenPipeError
+
+        stdout = MagicMock(buffer=BrokenPipe())
+        stdout.fileno.return_value = 1
+        args = argparse.Namespace(format="csv", status="active", fields=None)
+
+        with patch("sys.stdout", stdout), self.assertRaises(SystemExit) as exit_info:
+            output_sites(iter([{"id": 1, "name": "Site 1"}]), args)
+
+        self.assertEqual(exit_info.exception.code, 1)
+        mock_dup2.assert_called_once_with(99, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,326 @@
+"""
+Unit tests for netbox_retry.py module.
+
+These tests check the retry policy, rate limiter and circuit breaker on their
+own and inside both clients, with mock responses and without real waits.
+
+To run tests:
+    python -m unittest test_netbox_retry.py
+"""
+
+import asyncio
+import unittest
+from email.utils import formatdate
+from time import time
+from unittest.mock import patch, AsyncMock, Mock
+
+import aiohttp
+import requests
+
+# Import the module to test
+from netbox_retry import CircuitBreaker, CircuitOpenError, RateLimiter, RetryPolicy, parse_retry_after
+from netbox_sites import DEFAULT_STATUSES, NetBoxAPIClient
+from netbox_sites_async import AsyncNetBoxAPIClient
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for RetryPolicy and Retry-After parsing."""
+
+    def test_parse_retry_after(self):
+        """Test Retry-After in seconds, as an HTTP date and invalid."""
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertAlmostEqual(parse_retry_after(formatdate(time() + 60, usegmt=True)), 60, delta=2)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_delay(self):
+        """Test that the jittered delay grows, is capped and honors Retry-After."""
+        policy = RetryPolicy(max_retries=2, backoff_factor=1, max_backoff=3)
+        with patch("netbox_retry.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual([policy.delay(attempt) for attempt in range(4)], [1, 2, 3, 3])
+            self.assertEqual(policy.delay(0, retry_after=10), 10)
+        self.assertTrue(policy.should_retry(1))
+        self.assertFalse(policy.should_retry(2))
+
+    def test_retry_after_cap(self):
+        """Test that a Retry-After longer than the cap is not waited for."""
+        policy = RetryPolicy(max_retry_after=60)
+        self.assertTrue(policy.should_retry(0, retry_after=60))
+        self.assertFalse(policy.should_retry(0, retry_after=3600))
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the RateLimiter token bucket."""
+
+    def test_burst_then_wait(self):
+        """Test that requests beyond the burst wait for new tokens."""
+        limiter = RateLimiter(rate=10, burst=2)
+        with patch("netbox_retry.time.monotonic", return_value=100.0), \
+                patch("netbox_retry.time.sleep") as mock_sleep:
+            limiter._updated = 100.0
+            for _ in range(4):
+                limiter.acquire()
+
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [0.1, 0.2])
+
+    def test_invalid_rate(self):
+        """Test that the rate must be positive."""
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the CircuitBreaker states."""
+
+    def test_open_half_open_closed(self):
+        """Test that the circuit opens, lets one trial through and closes."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        with patch("netbox_retry.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+            breaker.before_request()
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_request()
+
+        with patch("netbox_retry.time.monotonic", return_value=131.0):
+            breaker.before_request()
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            # Only one trial request at a time
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_request()
+            breaker.record_success()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+
+    def test_trial_error(self):
+        """Test that a trial ending in an error or a cancellation doesn't stay half-open."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        with patch("netbox_retry.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+
+        with patch("netbox_retry.time.monotonic", return_value=131.0):
+            breaker.before_request()
+            breaker.record_error(requests.exceptions.ChunkedEncodingError("truncated"))
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        with patch("netbox_retry.time.monotonic", return_value=162.0):
+            breaker.before_request()
+            breaker.record_error(KeyboardInterrupt())
+            # A cancelled trial proves nothing: the next request is the trial
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            breaker.before_request()
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+
+@patch("netbox_sites.time.sleep")
+class TestClientRetries(unittest.TestCase):
+    """Test cases for retries in NetBoxAPIClient."""
+
+    def setUp(self):
+        """Set up a client and a page of sites."""
+        self.client = NetBoxAPIClient("http://test-netbox.local", "test-token-12345")
+        self.page = {"count": 1, "next": None, "results": [{"id": 1, "name": "Site 1"}]}
+        self.mock_response = Mock(status_code=200, headers={})
+        self.mock_response.json.return_value = self.page
+
+    @patch("requests.Session.get")
+    def test_retry_after(self, mock_get, mock_sleep):
+        """Test that 429/503 are retried, waiting what the server asks."""
+        mock_get.side_effect = [
+            Mock(status_code=429, headers={"Retry-After": "2"}),
+            requests.exceptions.ConnectionError("reset"),
+            self.mock_response,
+        ]
+
+        sites = self.client.get_sites_by_status("active")
+
+        self.assertEqual(sites, self.page["results"])
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[0].args[0], 2.0)
+        self.assertEqual(self.client.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    @patch("requests.Session.get")
+    def test_retry_after_too_long(self, mock_get, mock_sleep):
+        """Test that the client gives up instead of sleeping for an hour."""
+        mock_get.return_value = Mock(status_code=503, headers={"Retry-After": "3600"})
+        mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error")
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            list(self.client.iter_sites("active"))
+        self.assertEqual(mock_get.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("requests.Session.get")
+    def test_retries_exhausted(self, mock_get, mock_sleep):
+        """Test that the last failing response is raised after the retries."""
+        self.client.retry = RetryPolicy(max_retries=2)
+        mock_get.return_value = Mock(status_code=503, headers={})
+        mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error")
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            list(self.client.iter_sites("active"))
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_circuit_breaker_sheds_load(self, mock_get, mock_sleep):
+        """Test that an open circuit stops sending requests."""
+        self.client.retry = RetryPolicy(max_retries=0)
+        self.client.circuit_breaker = CircuitBreaker(failure_threshold=2)
+        mock_get.return_value = Mock(status_code=502, headers={})
+        mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("502 Bad Gateway")
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                list(self.client.iter_sites("active"))
+        with self.assertRaises(CircuitOpenError):
+            list(self.client.iter_sites("active"))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_rate_limiter(self, mock_get, mock_sleep):
+        """Test that every request takes a token of the limiter."""
+        self.client.rate_limiter = Mock()
+        mock_get.return_value = self.mock_response
+
+        self.client.count_sites("active")
+
+        self.client.rate_limiter.acquire.assert_called_once()
+
+    @patch("requests.Session.get")
+    def test_failed_trial_reopens_circuit(self, mock_get, mock_sleep):
+        """Test that a trial request raising any error lets a later trial through."""
+        self.client.retry = RetryPolicy(max_retries=0)
+        self.client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        mock_get.side_effect = [
+            requests.exceptions.ConnectionError("reset"),
+            requests.exceptions.ChunkedEncodingError("truncated"),
+            self.mock_response,
+        ]
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.count_sites("active")
+        # The trial request fails with an error that isn't retried
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.client.count_sites("active")
+
+        self.assertEqual(self.client.count_sites("active"), 1)
+        self.assertEqual(self.client.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestAsyncClientRetries(unittest.IsolatedAsyncioTestCase):
+    """Test cases for retries in AsyncNetBoxAPIClient."""
+
+    async def test_retry_after(self):
+        """Test that a 503 is retried, waiting what the server asks."""
+        statuses = [503, 200]
+
+        class FakeResponse:
+            headers = {"Retry-After": "1"}
+
+            def __init__(self):
+                self.status = statuses.pop(0)
+
+            def raise_for_status(self):
+                pass
+
+            async def json(self):
+                return {"count": 0, "results": []}
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                pass
+
+        fake_session = Mock()
+        fake_session.request.side_effect = lambda method, url, params=None: FakeResponse()
+        limiter = RateLimiter(rate=100)
+        client = AsyncNetBoxAPIClient("http://test-netbox.local", "test-token-12345", rate_limiter=limiter)
+
+        with patch.object(client, "_get_session", return_value=fake_session), \
+                patch("netbox_sites_async.asyncio.sleep", AsyncMock()) as mock_sleep:
+            sites = await client.get_sites_by_status("active")
+
+        self.assertEqual(sites, [])
+        self.assertEqual(fake_session.request.call_count, 2)
+        mock_sleep.assert_awaited_once_with(1.0)
+
+    async def test_retry_after_too_long(self):
+        """Test that the async client gives up instead of sleeping for an hour."""
+        response = Mock(status=503, headers={"Retry-After": "3600"})
+        response.raise_for_status.side_effect = aiohttp.ClientResponseError(Mock(), (), status=503)
+        response.__aenter__ = AsyncMock(return_value=response)
+        response.__aexit__ = AsyncMock(return_value=None)
+        fake_session = Mock()
+        fake_session.request.return_value = response
+        client = AsyncNetBoxAPIClient("http://test-netbox.local", "test-token-12345")
+
+        with patch.object(client, "_get_session", return_value=fake_session), \
+                patch("netbox_sites_async.asyncio.sleep", AsyncMock()) as mock_sleep:
+            with self.assertRaises(aiohttp.ClientResponseError):
+                await client._request_json("GET")
+        self.assertEqual(fake_session.request.call_count, 1)
+        mock_sleep.assert_not_awaited()
+
+    async def test_connection_errors_exhausted(self):
+        """Test that connection errors are raised after the retries."""
+        fake_session = Mock()
+        fake_session.request.side_effect = aiohttp.ClientConnectionError("reset")
+        client = AsyncNetBoxAPIClient(
+            "http://test-netbox.local", "test-token-12345", retry=RetryPolicy(max_retries=1)
+        )
+
+        with patch.object(client, "_get_session", return_value=fake_session), \
+                patch("netbox_sites_async.asyncio.sleep", AsyncMock()):
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                await client._request_json("GET")
+        self.assertEqual(fake_session.request.call_count, 2)
+
+    async def test_open_circuit(self):
+        """Test that an open circuit gives the same fallbacks as a failing request."""
+        client = AsyncNetBoxAPIClient("http://test-netbox.local", "test-token-12345")
+        client.circuit_breaker = CircuitBreaker(failure_threshold=1)
+        client.circuit_breaker.record_failure()
+
+        with patch("builtins.print"):
+            self.assertIsNone(await client.get_sites_by_status("active"))
+            self.assertEqual(await client.get_available_statuses(), list(DEFAULT_STATUSES))
+
+    async def test_cancelled_trial(self):
+        """Test that cancelling the trial request doesn't leave the circuit half-open."""
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        class FakeResponse:
+            async def __aenter__(self):
+                await hang()
+
+            async def __aexit__(self, *exc_info):
+                pass
+
+        fake_session = Mock()
+        fake_session.request.return_value = FakeResponse()
+        client = AsyncNetBoxAPIClient("http://test-netbox.local", "test-token-12345")
+        client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client.circuit_breaker.record_failure()
+
+        with patch.object(client, "_get_session", return_value=fake_session):
+            task = asyncio.create_task(client._request_json("GET"))
+            await started.wait()
+            self.assertEqual(client.circuit_breaker.state, CircuitBreaker.HALF_OPEN)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(client.circuit_breaker.state, CircuitBreaker.OPEN)
+        client.circuit_breaker.before_request()
+
+
+if __name__ == '__main__':
+    unittest.main()
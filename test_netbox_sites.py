@@ -9,7 +9,9 @@ To run tests:
     python -m unittest test_netbox_sites.py
 """
 
+import io
 import unittest
+from contextlib import redirect_stdout
 from unittest.mock import patch, Mock
 import json
 import sys
@@ -75,8 +77,36 @@ class TestNetBoxAPIClient(unittest.TestCase):
         self.assertEqual(self.client.headers["Authorization"], f"Token {self.api_token}")
         self.assertEqual(self.client.headers["Content-Type"], "application/json")
         self.assertEqual(self.client.headers["Accept"], "application/json")
+        # The session sends the same headers on every request
+        self.assertEqual(self.client.session.headers["Authorization"], f"Token {self.api_token}")
 
-    @patch('requests.get')
+    def test_connection_pool(self):
+        """Test that the session mounts a pooled adapter sized from the arguments."""
+        client = NetBoxAPIClient(self.base_url, self.api_token, pool_maxsize=32, pool_block=True)
+        adapter = client.session.get_adapter(self.base_url)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+        self.assertIs(client.session.get_adapter("https://netbox.example.com"), adapter)
+        self.assertEqual(client.session.headers["Connection"], "keep-alive")
+
+        # The pool defaults to one connection per parallel page fetch
+        client = NetBoxAPIClient(self.base_url, self.api_token, max_workers=3)
+        self.assertEqual(client.session.get_adapter(self.base_url)._pool_maxsize, 3)
+
+    def test_no_keep_alive(self):
+        """Test that disabling keep-alive asks the server to close connections."""
+        client = NetBoxAPIClient(self.base_url, self.api_token, keep_alive=False)
+        self.assertEqual(client.session.headers["Connection"], "close")
+
+    @patch('requests.Session.close')
+    def test_context_manager_closes_session(self, mock_close):
+        """Test that leaving the context manager closes the session."""
+        with NetBoxAPIClient(self.base_url, self.api_token) as client:
+            self.assertIsInstance(client, NetBoxAPIClient)
+            mock_close.assert_not_called()
+        mock_close.assert_called_once()
+
+    @patch('requests.Session.get')
     def test_get_sites_by_status_success(self, mock_get):
         """Test successful API response when getting sites by status."""
         # Configure the mock to return a successful response
@@ -96,11 +126,10 @@ class TestNetBoxAPIClient(unittest.TestCase):
         # Assert that the API was called with correct parameters
         mock_get.assert_called_once_with(
             self.client.url,
-            headers=self.client.headers,
             params={"status": "active"}
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_sites_by_status_no_status(self, mock_get):
         """Test API call without specifying a status filter."""
         # Configure the mock
@@ -118,11 +147,166 @@ class TestNetBoxAPIClient(unittest.TestCase):
         # Assert that the API was called with empty params
         mock_get.assert_called_once_with(
             self.client.url,
-            headers=self.client.headers,
             params={}
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
+    def test_get_sites_by_status_paginated(self, mock_get):
+        """Test that every page is fetched and merged in order."""
+        all_sites = [{"id": i, "name": f"Site {i}"} for i in range(1, 8)]
+
+        def fake_get(url, params=None):
+            offset = params.get("offset", 0)
+            limit = params.get("limit", 2)
+            mock_response = Mock()
+            mock_response.raise_for_status.return_value = None
+            mock_response.json.return_value = {
+                "count": len(all_sites),
+                "results": all_sites[offset:offset + limit],
+            }
+            return mock_response
+
+        mock_get.side_effect = fake_get
+
+        sites = self.client.get_sites_by_status(status="active")
+
+        # Assert that all the sites are returned in server order
+        self.assertEqual([site["id"] for site in sites], list(range(1, 8)))
+
+        # One request for the first page plus one per remaining page
+        self.assertEqual(mock_get.call_count, 4)
+        requested = sorted(call.kwargs["params"].get("offset", 0) for call in mock_get.call_args_list)
+        self.assertEqual(requested, [0, 2, 4, 6])
+        for call in mock_get.call_args_list:
+            self.assertEqual(call.kwargs["params"]["status"], "active")
+
+    @patch('requests.Session.get')
+    def test_iter_sites_streams_pages(self, mock_get):
+        """Test that iter_sites yields the first page before the rest is fetched."""
+        all_sites = [{"id": i, "name": f"Site {i}"} for i in range(1, 8)]
+
+        def fake_get(url, params=None):
+            offset = params.get("offset", 0)
+            limit = params.get("limit", 2)
+            mock_response = Mock()
+            mock_response.raise_for_status.return_value = None
+            mock_response.json.return_value = {
+                "count": len(all_sites),
+                "results": all_sites[offset:offset + limit],
+            }
+            return mock_response
+
+        mock_get.side_effect = fake_get
+
+        sites = self.client.iter_sites(status="planned")
+        # Nothing is requested until the iteration starts
+        mock_get.assert_not_called()
+
+        first = next(sites)
+        self.assertEqual(first["id"], 1)
+        self.assertEqual(mock_get.call_args_list[0].kwargs["params"], {"status": "planned"})
+
+        rest = list(sites)
+        self.assertEqual([site["id"] for site in rest], list(range(2, 8)))
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch('requests.Session.get')
+    def test_iter_sites_request_error(self, mock_get):
+        """Test that iter_sites lets request errors reach the caller."""
+        mock_get.side_effect = requests.exceptions.RequestException("Test connection error")
+
+        with self.assertRaises(requests.exceptions.RequestException):
+            list(self.client.iter_sites(status="active"))
+
+    @patch('requests.Session.get')
+    def test_count_sites(self, mock_get):
+        """Test that counting asks for a single site and returns the total."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {"count": 1234, "results": [{"id": 1}]}
+        mock_get.return_value = mock_response
+
+        self.assertEqual(self.client.count_sites("active", filters={"region": "europe"}), 1234)
+        mock_get.assert_called_once_with(
+            self.client.url,
+            params={"region": "europe", "status": "active", "limit": 1, "fields": "id"}
+        )
+
+    @patch('requests.Session.get')
+    def test_get_sites_multiple_statuses(self, mock_get):
+        """Test that several statuses are sent as one repeated-parameter query."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = self.mock_sites_data
+        mock_get.return_value = mock_response
+
+        sites = self.client.get_sites_by_status(("active", "planned"))
+
+        self.assertEqual(len(sites), 2)
+        mock_get.assert_called_once_with(
+            self.client.url,
+            params={"status": ["active", "planned"]}
+        )
+        prepared = requests.Request("GET", self.client.url, params=mock_get.call_args.kwargs["params"]).prepare()
+        self.assertTrue(prepared.url.endswith("?status=active&status=planned"))
+
+    @patch('requests.Session.get')
+    def test_count_sites_by_status(self, mock_get):
+        """Test that per-status totals come from limit=1 count requests."""
+        totals = {"active": 10, "planned": 3, "retired": 0}
+
+        def fake_get(url, params=None):
+            self.assertEqual(params["limit"], 1)
+            mock_response = Mock()
+            mock_response.raise_for_status.return_value = None
+            mock_response.json.return_value = {"count": totals[params["status"]], "results": []}
+            return mock_response
+
+        mock_get.side_effect = fake_get
+
+        counts = self.client.count_sites_by_status(["active", "planned", "retired"])
+
+        self.assertEqual(counts, totals)
+        self.assertEqual(list(counts), ["active", "planned", "retired"])
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch('requests.Session.get')
+    def test_iter_sites_brief_and_fields(self, mock_get):
+        """Test that brief mode and field selection are sent to the server."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {"count": 1, "results": [{"id": 1, "name": "Test Site 1"}]}
+        mock_get.return_value = mock_response
+
+        sites = list(self.client.iter_sites("active", fields=["id", "name"]))
+        self.assertEqual(sites, [{"id": 1, "name": "Test Site 1"}])
+        mock_get.assert_called_with(
+            self.client.url,
+            params={"status": "active", "fields": "id,name"}
+        )
+
+        self.client.get_sites_by_status("active", brief=True)
+        mock_get.assert_called_with(
+            self.client.url,
+            params={"status": "active", "brief": "true"}
+        )
+
+    @patch('requests.Session.get')
+    def test_get_sites_by_status_page_size(self, mock_get):
+        """Test that an explicit page size is sent as the limit."""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = self.mock_sites_data
+        mock_get.return_value = mock_response
+
+        self.client.get_sites_by_status(status="active", page_size=500)
+
+        mock_get.assert_called_once_with(
+            self.client.url,
+            params={"status": "active", "limit": 500}
+        )
+
+    @patch('requests.Session.get')
     def test_get_sites_by_status_request_error(self, mock_get):
         """Test handling of request errors."""
         # Configure the mock to raise an exception
@@ -139,7 +323,7 @@ class TestNetBoxAPIClient(unittest.TestCase):
             # Verify that the error was printed
             mock_print.assert_called_once()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_sites_by_status_json_error(self, mock_get):
         """Test handling of JSON parsing errors."""
         # Configure the mock to return invalid JSON
@@ -159,7 +343,7 @@ class TestNetBoxAPIClient(unittest.TestCase):
             # Verify that the error was printed
             mock_print.assert_called_once()
 
-    @patch('requests.options')
+    @patch('requests.Session.options')
     def test_get_available_statuses_success(self, mock_options):
         """Test successful retrieval of available statuses."""
         # Configure the mock
@@ -179,7 +363,7 @@ class TestNetBoxAPIClient(unittest.TestCase):
         self.assertIn("decommissioning", statuses)
         self.assertIn("retired", statuses)
 
-    @patch('requests.options')
+    @patch('requests.Session.options')
     def test_get_available_statuses_error(self, mock_options):
         """Test handling of errors when getting available statuses."""
         # Configure the mock to raise an exception
@@ -248,6 +432,33 @@ class TestDisplaySites(unittest.TestCase):
         
         # Verify that the function completes without errors
 
+    def test_display_sites_stream(self):
+        """Test displaying sites from an iterator, with the total at the end."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            display_sites(iter(self.mock_sites), "active")
+
+        text = output.getvalue()
+        self.assertIn("Sites found with status 'active':", text)
+        self.assertIn("Name: Test Site 2", text)
+        self.assertTrue(text.rstrip().endswith("Total: 2 sites"))
+
+    def test_display_sites_multiple_statuses(self):
+        """Test the title when several statuses were queried."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            display_sites(self.mock_sites, ["active", "planned"])
+
+        self.assertIn("Sites found with status 'active, planned' (2 sites):", output.getvalue())
+
+    def test_display_sites_empty_stream(self):
+        """Test displaying an empty iterator of sites."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            display_sites(iter([]), "active")
+
+        self.assertEqual(output.getvalue(), "No sites found with status 'active'\n")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Unit tests for netbox_sites_async.py module.
+
+These tests replace the HTTP layer of AsyncNetBoxAPIClient with mocks, so they
+run without an actual NetBox server connection.
+
+To run tests:
+    python -m unittest test_netbox_sites_async.py
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch, AsyncMock, Mock
+
+import aiohttp
+
+# Import the module to test
+from netbox_sites_async import AsyncNetBoxAPIClient
+
+
+class TestAsyncNetBoxAPIClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the AsyncNetBoxAPIClient class."""
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.base_url = "http://test-netbox.local"
+        self.api_token = "test-token-12345"
+        self.client = AsyncNetBoxAPIClient(self.base_url, self.api_token, max_concurrency=2)
+        self.all_sites = [{"id": i, "name": f"Site {i}"} for i in range(1, 8)]
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def fake_page(self, method, params=None):
+        """Serve self.all_sites in pages of two sites."""
+        offset = params.get("offset", 0)
+        limit = params.get("limit", 2)
+        await asyncio.sleep(0)
+        return {
+            "count": len(self.all_sites),
+            "results": self.all_sites[offset:offset + limit],
+        }
+
+    def test_init(self):
+        """Test if the client is initialized correctly with proper URL and headers."""
+        self.assertEqual(self.client.url, "http://test-netbox.local/api/dcim/sites/")
+        self.assertEqual(self.client.headers["Authorization"], f"Token {self.api_token}")
+        self.assertEqual(self.client.max_concurrency, 2)
+        # The session is only opened on the first request
+        self.assertIsNone(self.client.session)
+
+    async def test_get_sites_by_status_paginated(self):
+        """Test that every page is fetched and merged in order."""
+        with patch.object(self.client, "_request_json", side_effect=self.fake_page) as mock_request:
+            sites = await self.client.get_sites_by_status(status="active")
+
+        self.assertEqual([site["id"] for site in sites], list(range(1, 8)))
+        self.assertEqual(mock_request.await_count, 4)
+        for call in mock_request.await_args_list:
+            self.assertEqual(call.args[1]["status"], "active")
+
+    async def test_iter_sites_stops_early(self):
+        """Test that stopping the iteration cancels the pages requested ahead."""
+        with patch.object(self.client, "_request_json", side_effect=self.fake_page):
+            sites = self.client.iter_sites()
+            first = [await sites.__anext__() for _ in range(3)]
+            await sites.aclose()
+
+        self.assertEqual([site["id"] for site in first], [1, 2, 3])
+
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency requests are in flight."""
+        in_flight = 0
+        peak = 0
+
+        class FakeResponse:
+            status = 200
+            headers = {}
+
+            def raise_for_status(self):
+                pass
+
+            async def json(self):
+                return {"count": 0, "results": []}
+
+            async def __aenter__(self):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                return self
+
+            async def __aexit__(self, *exc_info):
+                nonlocal in_flight
+                in_flight -= 1
+
+        fake_session = Mock()
+        fake_session.request.side_effect = lambda method, url, params=None: FakeResponse()
+
+        with patch.object(self.client, "_get_session", return_value=fake_session):
+            await asyncio.gather(*(self.client.get_sites_by_status(s) for s in ("a", "b", "c", "d")))
+
+        self.assertEqual(fake_session.request.call_count, 4)
+        self.assertEqual(peak, 2)
+
+    async def test_get_sites_by_status_request_error(self):
+        """Test handling of request errors."""
+        error = AsyncMock(side_effect=aiohttp.ClientError("Test connection error"))
+        with patch.object(self.client, "_request_json", error), patch("builtins.print") as mock_print:
+            sites = await self.client.get_sites_by_status(status="active")
+
+        self.assertIsNone(sites)
+        mock_print.assert_called_once()
+
+    async def test_get_available_statuses(self):
+        """Test retrieval of available statuses and the fallback on errors."""
+        schema = {"actions": {"POST": {"status": {"choices": [{"value": "active"}, {"value": "planned"}]}}}}
+        with patch.object(self.client, "_request_json", AsyncMock(return_value=schema)):
+            self.assertEqual(await self.client.get_available_statuses(), ["active", "planned"])
+
+        error = AsyncMock(side_effect=aiohttp.ClientError("Test connection error"))
+        with patch.object(self.client, "_request_json", error), patch("builtins.print"):
+            statuses = await self.client.get_available_statuses()
+        self.assertEqual(len(statuses), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for netbox_snapshot.py module.
+
+These tests store sites in a temporary SQLite snapshot and query it, and run
+the CLI in --offline mode against it.
+
+To run tests:
+    python -m unittest test_netbox_snapshot.py
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+# Import the module to test
+from netbox_snapshot import SiteSnapshot, format_age
+import netbox_sites
+
+
+class TestSiteSnapshot(unittest.TestCase):
+    """Test cases for the SiteSnapshot class."""
+
+    def setUp(self):
+        """Set up a snapshot with a few sites in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "sites.sqlite3")
+        self.sites = [
+            {
+                "id": 1,
+                "name": "Site 1",
+                "slug": "site-1",
+                "status": {"value": "active", "label": "Active"},
+                "region": {"id": 1, "name": "Europe", "slug": "europe"},
+                "tenant": None,
+            },
+            {
+                "id": 2,
+                "name": "Site 2",
+                "slug": "site-2",
+                "status": {"value": "planned", "label": "Planned"},
+                "region": {"id": 1, "name": "Europe", "slug": "europe"},
+                "tenant": {"id": 3, "name": "ACME", "slug": "acme"},
+            },
+            {
+                "id": 3,
+                "name": "Site 3",
+                "slug": "site-3",
+                "status": {"value": "planned", "label": "Planned"},
+                "region": {"id": 2, "name": "America", "slug": "america"},
+                "tenant": None,
+            },
+        ]
+        self.snapshot = SiteSnapshot(self.path)
+        self.snapshot.replace(self.sites, "http://test-netbox.local")
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.tmp_dir.cleanup()
+
+    def test_query(self):
+        """Test filtering by status, region, tenant and slug."""
+        self.assertEqual(self.snapshot.count(), 3)
+        self.assertEqual([site["id"] for site in self.snapshot.query(status="planned")], [2, 3])
+        self.assertEqual(
+            [site["id"] for site in self.snapshot.query(status="planned", region="europe")], [2]
+        )
+        self.assertEqual([site["id"] for site in self.snapshot.query(tenant="acme")], [2])
+        self.assertEqual(list(self.snapshot.query(slug="site-1")), [self.sites[0]])
+        self.assertEqual(
+            [site["id"] for site in self.snapshot.query(status=["active", "planned"], region="europe")],
+            [1, 2],
+        )
+        # None values don't filter
+        self.assertEqual(len(list(self.snapshot.query(status=None))), 3)
+
+    def test_unknown_filter(self):
+        """Test that only the indexed columns can be used as filters."""
+        with self.assertRaises(ValueError):
+            list(self.snapshot.query(description="x"))
+
+    def test_indexes(self):
+        """Test that every filter column is indexed."""
+        indexes = {
+            row[0] for row in self.snapshot.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'sites'"
+            )
+        }
+        for column in ("status", "slug", "region", "tenant", "name"):
+            self.assertIn(f"sites_{column}", indexes)
+
+    def test_replace_and_metadata(self):
+        """Test that a new inventory replaces the previous one."""
+        self.snapshot.replace(self.sites[:1], "http://other-netbox.local")
+
+        with SiteSnapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.count(), 1)
+            self.assertEqual(snapshot.base_url, "http://other-netbox.local")
+            self.assertLess(snapshot.age(), 60)
+
+    def test_format_age(self):
+        """Test the human-readable snapshot age."""
+        self.assertEqual(format_age(None), "never updated")
+        self.assertEqual(format_age(42), "42s")
+        self.assertEqual(format_age(3 * 3600 + 12 * 60), "3h 12m")
+        self.assertEqual(format_age(2 * 86400 + 3600), "2d 1h")
+
+    def test_offline_cli(self):
+        """Test that --offline answers from the snapshot without a token."""
+        argv = ["netbox_sites.py", "--offline", "--snapshot", self.path, "--status", "planned", "--region", "america"]
+        output = io.StringIO()
+        with patch("sys.argv", argv), patch("requests.Session.get") as mock_get, redirect_stdout(output):
+            netbox_sites.main()
+
+        mock_get.assert_not_called()
+        text = output.getvalue()
+        self.assertIn("of http://test-netbox.local (3 sites, updated", text)
+        self.assertIn("Name: Site 3", text)
+        self.assertNotIn("Name: Site 2", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Unit tests for netbox_sync.py module.
+
+These tests use a mock client that serves an in-memory inventory, so the
+synchronization logic is tested without an actual NetBox server connection.
+
+To run tests:
+    python -m unittest test_netbox_sync.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+# Import the module to test
+from netbox_sync import SiteSync, _latest_update
+
+
+class FakeInventory:
+    """Minimal stand-in for the NetBox sites endpoint."""
+
+    def __init__(self, sites):
+        self.sites = {site["id"]: site for site in sites}
+
+    def iter_sites(self, status=None, page_size=None, filters=None, brief=False, fields=None):
+        filters = filters or {}
+        for site in self.sites.values():
+            since = filters.get("last_updated__gte")
+            if since and site["last_updated"] < since:
+                continue
+            if fields == ["id"]:
+                yield {"id": site["id"]}
+            else:
+                yield dict(site)
+
+    def count_sites(self, status=None, filters=None):
+        return len(self.sites)
+
+
+class TestSiteSync(unittest.TestCase):
+    """Test cases for the SiteSync class."""
+
+    def setUp(self):
+        """Set up a fake inventory and a state file in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp_dir.name, "sites.json")
+        self.inventory = FakeInventory([
+            {"id": 1, "name": "Site 1", "last_updated": "2025-07-18T10:00:00Z"},
+            {"id": 2, "name": "Site 2", "last_updated": "2025-07-18T11:00:00Z"},
+            {"id": 3, "name": "Site 3", "last_updated": "2025-07-18T12:00:00Z"},
+        ])
+        self.client = Mock(base_url="http://test-netbox.local")
+        self.client.iter_sites.side_effect = self.inventory.iter_sites
+        self.client.count_sites.side_effect = self.inventory.count_sites
+        self.site_sync = SiteSync(self.client, self.state_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_first_run_is_full(self):
+        """Test that the first run downloads everything and stores the mark."""
+        result = self.site_sync.sync()
+
+        self.assertTrue(result.full)
+        self.assertEqual(result.total, 3)
+        self.assertEqual(result.high_water_mark, "2025-07-18T12:00:00Z")
+        self.assertEqual([site["id"] for site in self.site_sync.sites()], [1, 2, 3])
+
+    def test_no_change_run(self):
+        """Test that a run without changes only asks for the sites at the mark."""
+        self.site_sync.sync()
+        self.client.iter_sites.reset_mock()
+
+        result = self.site_sync.sync()
+
+        self.assertFalse(result.full)
+        self.assertEqual((result.changed, result.deleted, result.total), (0, 0, 3))
+        self.client.iter_sites.assert_called_once_with(
+            filters={"last_updated__gte": "2025-07-18T12:00:00Z"}
+        )
+
+    def test_changes_and_deletions_are_merged(self):
+        """Test that updates, creations and deletions reach the snapshot."""
+        self.site_sync.sync()
+        self.inventory.sites[2] = {"id": 2, "name": "Renamed", "last_updated": "2025-07-19T09:00:00Z"}
+        self.inventory.sites[4] = {"id": 4, "name": "Site 4", "last_updated": "2025-07-19T10:00:00Z"}
+        del self.inventory.sites[1]
+
+        result = self.site_sync.sync()
+
+        self.assertEqual((result.changed, result.deleted, result.total), (2, 1, 3))
+        self.assertEqual(result.high_water_mark, "2025-07-19T10:00:00Z")
+        sites = self.site_sync.sites()
+        self.assertEqual([site["id"] for site in sites], [2, 3, 4])
+        self.assertEqual(sites[0]["name"], "Renamed")
+
+    def test_other_netbox_state_is_ignored(self):
+        """Test that a state file of another NetBox starts a full sync."""
+        self.site_sync.sync()
+        other = Mock(base_url="http://other-netbox.local")
+        other.iter_sites.side_effect = self.inventory.iter_sites
+
+        self.assertTrue(SiteSync(other, self.state_path).sync().full)
+
+    def test_latest_update_parses_timestamps(self):
+        """Test that timestamps with and without fractions compare correctly."""
+        sites = [{"last_updated": "2025-07-18T10:00:00.500000Z"}, {"last_updated": "2025-07-18T10:00:00Z"}]
+        self.assertEqual(_latest_update(sites), "2025-07-18T10:00:00.500000Z")
+        self.assertEqual(_latest_update([], "2025-07-18T10:00:00Z"), "2025-07-18T10:00:00Z")
+
+
+if __name__ == '__main__':
+    unittest.main()